@@ -14,7 +14,7 @@ pip install -r requirements.txt
 python manage.py migrate
 
 # Collect static files
-python manage.py collectstatic --noinput
+python manage.py collectstatic --noinput --clear
 
 # Restart services
 sudo systemctl restart gunicorn
@@ -48,6 +48,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'swap_app.middleware.RequestNowMiddleware',
 ]
 
 ROOT_URLCONF = 'money_swapv2.urls'
@@ -2,15 +2,18 @@
 Production settings for MoneySwap v2
 """
 import os
+import queue
 from .settings import *
-import sentry_sdk
-from sentry_sdk.integrations.django import DjangoIntegration
 
 # Security
 DEBUG = False
 ALLOWED_HOSTS = ['moneyswap.mw', 'www.moneyswap.mw', 'api.moneyswap.mw']
 
-# Database - PostgreSQL in production
+# Database - PostgreSQL in production, reached through pgbouncer in
+# transaction pooling mode so all Gunicorn/Celery workers share a small set of
+# server backends. pgbouncer owns connection lifetimes, hence CONN_MAX_AGE=0,
+# and server-side cursors must be off because they don't survive a pooled
+# transaction boundary.
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
@@ -18,8 +21,9 @@ DATABASES = {
         'USER': os.environ.get('DB_USER', 'moneyswap_user'),
         'PASSWORD': os.environ.get('DB_PASSWORD', ''),
         'HOST': os.environ.get('DB_HOST', 'localhost'),
-        'PORT': os.environ.get('DB_PORT', '5432'),
-        'CONN_MAX_AGE': 600,
+        'PORT': os.environ.get('DB_PORT', '6432'),  # pgbouncer
+        'CONN_MAX_AGE': 0,
+        'DISABLE_SERVER_SIDE_CURSORS': True,
     }
 }
 
@@ -34,9 +38,15 @@ SECURE_HSTS_PRELOAD = True
 SECURE_BROWSER_XSS_FILTER = True
 SECURE_CONTENT_TYPE_NOSNIFF = True
 
-# Static files with Whitenoise
+# Static files with Whitenoise as the CDN origin. The CDN origin-pulls each
+# hashed filename once and serves it from the edge afterwards.
+STATIC_URL = os.environ.get('STATIC_URL', 'https://cdn.moneyswap.mw/static/')
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+# Brotli (.br) sidecars are emitted alongside .gz at collectstatic time when brotli is installed
+WHITENOISE_USE_FINDERS = False
+WHITENOISE_MAX_AGE = 31536000  # 1 year
+WHITENOISE_KEEP_ONLY_HASHED_FILES = True
 
 # Email configuration
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
@@ -52,6 +62,13 @@ CELERY_BROKER_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
 CELERY_RESULT_BACKEND = os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
 
 # Logging
+# Request threads only enqueue records; SwapAppConfig.ready() builds the
+# ERROR file handler and starts a QueueListener that drains LOG_QUEUE into it.
+# The queue is bounded so a stalled disk can't grow memory without limit;
+# records beyond it are dropped (and reported on stderr).
+LOG_FILE = '/var/log/moneyswap/error.log'
+LOG_QUEUE = queue.Queue(10000)
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -66,11 +83,10 @@ LOGGING = {
         },
     },
     'handlers': {
-        'file': {
+        'queue': {
             'level': 'ERROR',
-            'class': 'logging.FileHandler',
-            'filename': '/var/log/moneyswap/error.log',
-            'formatter': 'verbose',
+            'class': 'logging.handlers.QueueHandler',
+            'queue': LOG_QUEUE,
         },
         'console': {
             'level': 'INFO',
@@ -80,12 +96,12 @@ LOGGING = {
     },
     'loggers': {
         'django': {
-            'handlers': ['file', 'console'],
+            'handlers': ['queue', 'console'],
             'level': 'ERROR',
             'propagate': True,
         },
         'swap_app': {
-            'handlers': ['file', 'console'],
+            'handlers': ['queue', 'console'],
             'level': 'INFO',
             'propagate': False,
         },
@@ -93,11 +109,27 @@ LOGGING = {
 }
 
 # Sentry error tracking
+SENTRY_TRACES_RATE = float(os.environ.get('SENTRY_TRACES_RATE', '0.05'))
+SENTRY_PROFILES_RATE = float(os.environ.get('SENTRY_PROFILES_RATE', '0'))
+
+def sentry_traces_sampler(sampling_context):
+    """Never trace health checks or static files; sample everything else"""
+    path = sampling_context.get('wsgi_environ', {}).get('PATH_INFO', '')
+    if path.startswith(('/health', '/static')):
+        return 0
+    return SENTRY_TRACES_RATE
+
 if os.environ.get('SENTRY_DSN'):
+    # Imported here so management commands don't pay for the SDK when it's off
+    import sentry_sdk
+    from sentry_sdk.integrations.django import DjangoIntegration
+    
     sentry_sdk.init(
         dsn=os.environ.get('SENTRY_DSN'),
         integrations=[DjangoIntegration()],
-        traces_sample_rate=1.0,
+        traces_sample_rate=SENTRY_TRACES_RATE,
+        traces_sampler=sentry_traces_sampler,
+        profiles_sample_rate=SENTRY_PROFILES_RATE,
         send_default_pii=True
     )
 
@@ -108,7 +140,13 @@ CORS_ALLOWED_ORIGINS = [
 ]
 
 # Security middleware
+# The cache middleware pair wraps the stack so repeat anonymous GETs are
+# served straight from Redis. Django's own pair would also cache logged-in
+# pages per session (Vary: Cookie), serving stale swap status and replaying
+# flash messages, so these variants skip any request with a user, session or
+# messages cookie.
 MIDDLEWARE = [
+    'swap_app.middleware.AnonymousUpdateCacheMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
@@ -118,8 +156,14 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'swap_app.middleware.RequestNowMiddleware',
+    'swap_app.middleware.AnonymousFetchFromCacheMiddleware',
 ]
 
+CACHE_MIDDLEWARE_ALIAS = 'default'
+CACHE_MIDDLEWARE_SECONDS = 60
+CACHE_MIDDLEWARE_KEY_PREFIX = 'ms'
+
 # Cache configuration
 CACHES = {
     'default': {
@@ -127,6 +171,11 @@ CACHES = {
         'LOCATION': os.environ.get('REDIS_URL', 'redis://localhost:6379/1'),
         'OPTIONS': {
             'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+            # redis-py picks the C hiredis parser automatically when it is installed
+            'CONNECTION_POOL_KWARGS': {'max_connections': 200, 'retry_on_timeout': True},
+            'COMPRESSOR': 'django_redis.compressors.zstd.ZStdCompressor',
+            # A Redis blip degrades to cache misses instead of 500s
+            'IGNORE_EXCEPTIONS': True,
         }
     }
 }
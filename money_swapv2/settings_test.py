@@ -0,0 +1,9 @@
+"""
+Test settings for MoneySwap v2
+"""
+from .settings import *
+
+# Fast hasher for tests and fixture bootstraps - never use in production
+PASSWORD_HASHERS = [
+    'django.contrib.auth.hashers.MD5PasswordHasher',
+]
\ No newline at end of file
@@ -0,0 +1,41 @@
+"""
+Start-up warm-up for the WSGI/ASGI entry points.
+
+Pays one-off costs (URLconf and view imports, model metadata, DB driver and
+first connect, cache client) when a worker boots rather than on the first
+request it serves.
+"""
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def warm_up():
+    from django.apps import apps
+    from django.core.cache import cache
+    from django.db import connection
+    from django.urls import get_resolver
+
+    apps.check_apps_ready()
+    for model in apps.get_models():
+        model._meta.get_fields()
+
+    try:
+        get_resolver().url_patterns
+    except Exception:
+        logger.exception("URLconf warm-up failed")
+
+    try:
+        connection.ensure_connection()
+    except Exception:
+        logger.warning("Database unavailable during warm-up", exc_info=True)
+    finally:
+        # Don't carry a socket into forked workers; pgbouncer keeps the
+        # server side warm and CONN_MAX_AGE=0 would close it anyway.
+        connection.close()
+
+    try:
+        cache.get('warmup')
+    except Exception:
+        logger.warning("Cache unavailable during warm-up", exc_info=True)
\ No newline at end of file
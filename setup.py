@@ -9,70 +9,67 @@ def setup_sample_data():
     django.setup()
     
     from django.contrib.auth import get_user_model
-    from swap_app.models import User, Agent, Account
+    from django.contrib.auth.hashers import make_password
+    from swap_app.models import Agent
     
     User = get_user_model()
     
-    # Create sample client
-    client, created = User.objects.get_or_create(
-        username='client1',
-        defaults={
-            'email': 'client1@example.com',
-            'phone_number': '0881234567',
-            'role': 'client',
-            'is_verified': True,
-            'location_address': 'Blantyre, Malawi'
-        }
-    )
-    if created:
-        client.set_password('password123')
-        client.save()
-        print("Created sample client: client1 / password123")
+    # Hash each distinct password once; PBKDF2 is deliberately slow
+    sample_password = make_password('password123')
+    admin_password = make_password('admin123')
     
-    # Create sample agent
-    agent_user, created = User.objects.get_or_create(
-        username='agent1',
-        defaults={
-            'email': 'agent1@example.com',
-            'phone_number': '0997654321',
-            'role': 'agent',
-            'is_verified': True,
-            'location_address': 'Lilongwe, Malawi'
-        }
-    )
-    if created:
-        agent_user.set_password('password123')
-        agent_user.save()
-        
-        # Create agent profile
-        agent, _ = Agent.objects.get_or_create(
-            user=agent_user,
-            defaults={
-                'verified': True,
-                'is_online': True,
-                'float_mpamba': 50000,
-                'float_airtel': 30000,
-                'rating': 4.8
-            }
-        )
-        print("Created sample agent: agent1 / password123")
+    sample_users = [
+        # Sample client
+        User(
+            username='client1',
+            email='client1@example.com',
+            phone_number='0881234567',
+            role='client',
+            is_verified=True,
+            location_address='Blantyre, Malawi',
+            password=sample_password,
+        ),
+        # Sample agent
+        User(
+            username='agent1',
+            email='agent1@example.com',
+            phone_number='0997654321',
+            role='agent',
+            is_verified=True,
+            location_address='Lilongwe, Malawi',
+            password=sample_password,
+        ),
+        # Admin user
+        User(
+            username='admin',
+            email='admin@moneyswap.mw',
+            phone_number='0880000000',
+            role='admin',
+            is_verified=True,
+            is_staff=True,
+            is_superuser=True,
+            password=admin_password,
+        ),
+    ]
     
-    # Create admin user
-    admin, created = User.objects.get_or_create(
-        username='admin',
-        defaults={
-            'email': 'admin@moneyswap.mw',
-            'phone_number': '0880000000',
-            'role': 'admin',
-            'is_verified': True,
-            'is_staff': True,
-            'is_superuser': True
-        }
-    )
-    if created:
-        admin.set_password('admin123')
-        admin.save()
-        print("Created admin user: admin / admin123")
+    existing = set(User.objects.filter(
+        username__in=[user.username for user in sample_users]
+    ).values_list('username', flat=True))
+    new_users = [user for user in sample_users if user.username not in existing]
+    User.objects.bulk_create(new_users, ignore_conflicts=True)
+    
+    # bulk_create skips post_save, so the agent profile is created here
+    if any(user.username == 'agent1' for user in new_users):
+        agent_user = User.objects.get(username='agent1')
+        Agent.objects.bulk_create([
+            Agent(user=agent_user, verified=True, is_online=True, rating=4.8)
+        ], ignore_conflicts=True)
+    
+    for user in new_users:
+        if user.username == 'admin':
+            print("Created admin user: admin / admin123")
+        else:
+            print(f"Created sample {user.role}: {user.username} / password123")
     
     print("\nSample data created successfully!")
     print("\nLogin credentials:")
@@ -1,8 +1,10 @@
-from datetime import timezone
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from django.db.models import Count, Sum
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
 from .models import User, Agent, SwapRequest, ProofUpload, Dispute, Notification, Block, BlockchainEvent, KYCDocument
+from .context_processors import unread_notifications_cache_key
 
 @admin.register(User)
 class CustomUserAdmin(UserAdmin):
@@ -28,9 +30,12 @@ class AgentAdmin(admin.ModelAdmin):
 
 @admin.register(SwapRequest)
 class SwapRequestAdmin(admin.ModelAdmin):
-    list_display = ('reference', 'client', 'agent', 'amount', 'from_service', 'to_service', 'status', 'created_at')
-    list_filter = ('status', 'from_service', 'to_service', 'created_at')
-    readonly_fields = ('reference', 'created_at', 'updated_at')
+    list_display = ('reference', 'client', 'agent', 'amount', 'from_service', 'to_service', 'status',
+                    'client_proof_verified', 'agent_proof_verified', 'created_at')
+    list_select_related = ('client', 'agent__user')
+    list_filter = ('status', 'from_service', 'to_service', 'client_proof_verified', 'agent_proof_verified', 'created_at')
+    # The proof flags are derived from verified proofs by refresh_proof_flags
+    readonly_fields = ('reference', 'client_proof_verified', 'agent_proof_verified', 'created_at', 'updated_at')
     search_fields = ('reference', 'client__username', 'agent__user__username')
     actions = ['mark_as_complete', 'mark_as_dispute']
     
@@ -47,23 +52,34 @@ class SwapRequestAdmin(admin.ModelAdmin):
 @admin.register(ProofUpload)
 class ProofUploadAdmin(admin.ModelAdmin):
     list_display = ('swap_request', 'proof_type', 'status', 'confidence_score', 'created_at')
+    list_select_related = ('swap_request',)
     list_filter = ('proof_type', 'status', 'created_at')
     readonly_fields = ('created_at',)
     actions = ['verify_proofs', 'reject_proofs']
     
+    def _set_status(self, queryset, status):
+        # queryset.update() skips the ProofUpload signals, so refresh the
+        # swaps' proof flags here
+        swap_ids = set(queryset.values_list('swap_request_id', flat=True))
+        updated = queryset.update(status=status)
+        for swap in SwapRequest.objects.filter(pk__in=swap_ids).select_related('agent'):
+            swap.refresh_proof_flags()
+        return updated
+    
     def verify_proofs(self, request, queryset):
-        updated = queryset.update(status='verified')
+        updated = self._set_status(queryset, 'verified')
         self.message_user(request, f'{updated} proofs verified')
     verify_proofs.short_description = "Verify selected proofs"
     
     def reject_proofs(self, request, queryset):
-        updated = queryset.update(status='rejected')
+        updated = self._set_status(queryset, 'rejected')
         self.message_user(request, f'{updated} proofs rejected')
     reject_proofs.short_description = "Reject selected proofs"
 
 @admin.register(Dispute)
 class DisputeAdmin(admin.ModelAdmin):
     list_display = ('swap_request', 'severity', 'status', 'created_at')
+    list_select_related = ('swap_request',)
     list_filter = ('severity', 'status', 'created_at')
     readonly_fields = ('created_at',)
     actions = ['resolve_disputes', 'escalate_disputes']
@@ -83,27 +99,43 @@ class BlockAdmin(admin.ModelAdmin):
     list_display = ('index', 'timestamp', 'block_hash', 'created_at')
     readonly_fields = ('index', 'timestamp', 'previous_hash', 'block_hash', 'nonce', 'node_signature', 'validator_signatures')
     list_filter = ('timestamp',)
+    show_full_result_count = False
+    
+    def get_queryset(self, request):
+        # The changelist never shows the signature columns; the change form
+        # loads them on demand
+        return super().get_queryset(request).defer('node_signature', 'validator_signatures')
 
 @admin.register(BlockchainEvent)
 class BlockchainEventAdmin(admin.ModelAdmin):
     list_display = ('event_type', 'entity_ref', 'timestamp', 'block')
+    list_select_related = ('block',)
     list_filter = ('event_type', 'timestamp')
     readonly_fields = ('event_id', 'timestamp', 'payload_hash', 'signature')
     search_fields = ('entity_ref',)
+    show_full_result_count = False
 
 @admin.register(Notification)
 class NotificationAdmin(admin.ModelAdmin):
     list_display = ('user', 'type', 'is_read', 'created_at')
+    list_select_related = ('user',)
     list_filter = ('type', 'is_read', 'created_at')
     readonly_fields = ('created_at',)
     actions = ['mark_as_read', 'mark_as_unread']
     
+    def _invalidate_notification_cache(self, queryset):
+        # queryset.update() bypasses post_save, so clear the dropdown caches here
+        user_ids = set(queryset.values_list('user_id', flat=True))
+        cache.delete_many([unread_notifications_cache_key(user_id) for user_id in user_ids])
+    
     def mark_as_read(self, request, queryset):
+        self._invalidate_notification_cache(queryset)
         updated = queryset.update(is_read=True)
         self.message_user(request, f'{updated} notifications marked as read')
     mark_as_read.short_description = "Mark selected as read"
     
     def mark_as_unread(self, request, queryset):
+        self._invalidate_notification_cache(queryset)
         updated = queryset.update(is_read=False)
         self.message_user(request, f'{updated} notifications marked as unread')
     mark_as_unread.short_description = "Mark selected as unread"
@@ -111,20 +143,15 @@ class NotificationAdmin(admin.ModelAdmin):
 @admin.register(KYCDocument)
 class KYCDocumentAdmin(admin.ModelAdmin):
     list_display = ('user', 'document_type', 'status', 'submitted_at')
+    list_select_related = ('user',)
     list_filter = ('document_type', 'status', 'submitted_at')
     readonly_fields = ('submitted_at',)
     actions = ['approve_kyc', 'reject_kyc']
     
     def approve_kyc(self, request, queryset):
-        for kyc in queryset:
-            kyc.status = 'approved'
-            kyc.reviewed_by = request.user
-            kyc.reviewed_at = timezone.now()
-            kyc.save()
-            kyc.user.is_verified = True
-            kyc.user.verification_level = 'full'
-            kyc.user.save()
-        self.message_user(request, f'{queryset.count()} KYC documents approved')
+        User.objects.filter(id__in=queryset.values('user_id')).update(is_verified=True, verification_level='full')
+        updated = queryset.update(status='approved', reviewed_by=request.user, reviewed_at=timezone.now())
+        self.message_user(request, f'{updated} KYC documents approved')
     approve_kyc.short_description = "Approve selected KYC"
     
     def reject_kyc(self, request, queryset):
@@ -137,17 +164,30 @@ class DashboardAdmin(admin.AdminSite):
     site_title = "MoneySwap Admin"
     index_title = "Dashboard"
 
-    def index(self, request, extra_context=None):
-        # Add custom statistics to the admin dashboard
-        stats = {
+    def _build_stats(self):
+        # Conditional aggregation: one scan per table instead of one per figure
+        agent_stats = Agent.objects.aggregate(
+            verified_count=Count('id', filter=Q(verified=True)),
+            unverified_count=Count('id', filter=Q(verified=False)),
+        )
+        swap_stats = SwapRequest.objects.aggregate(
+            total_count=Count('id'),
+            complete_volume=Sum('amount', filter=Q(status='COMPLETE')),
+            complete_platform_fee=Sum('platform_fee', filter=Q(status='COMPLETE')),
+        )
+        return {
             'total_users': User.objects.count(),
-            'total_agents': Agent.objects.filter(verified=True).count(),
-            'total_swaps': SwapRequest.objects.count(),
-            'pending_verification': Agent.objects.filter(verified=False).count(),
+            'total_agents': agent_stats['verified_count'],
+            'total_swaps': swap_stats['total_count'],
+            'pending_verification': agent_stats['unverified_count'],
             'pending_disputes': Dispute.objects.filter(status='open').count(),
-            'total_volume': SwapRequest.objects.filter(status='COMPLETE').aggregate(Sum('amount'))['amount__sum'] or 0,
-            'platform_earnings': SwapRequest.objects.filter(status='COMPLETE').aggregate(Sum('platform_fee'))['platform_fee__sum'] or 0,
+            'total_volume': swap_stats['complete_volume'] or 0,
+            'platform_earnings': swap_stats['complete_platform_fee'] or 0,
         }
+
+    def index(self, request, extra_context=None):
+        # Add custom statistics to the admin dashboard
+        stats = cache.get_or_set('admin_dashboard_stats', self._build_stats, 60)
         
         extra_context = extra_context or {}
         extra_context['stats'] = stats
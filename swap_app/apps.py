@@ -1,8 +1,36 @@
+import atexit
+import logging
+import logging.handlers
 from django.apps import AppConfig
 
+_log_listener = None
+
 class SwapAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'swap_app'
     
     def ready(self):
-        import swap_app.signals
\ No newline at end of file
+        import swap_app.signals
+        self._start_log_listener()
+    
+    def _start_log_listener(self):
+        """Drain settings.LOG_QUEUE into an ERROR file handler (once per process)"""
+        global _log_listener
+        from django.conf import settings
+        
+        log_queue = getattr(settings, 'LOG_QUEUE', None)
+        if log_queue is None or _log_listener is not None:
+            return
+        
+        # Built here rather than in LOGGING: dictConfig only keeps weak
+        # references to handlers no logger uses, so a configured 'file'
+        # handler would be collected. The listener holds this one.
+        file_handler = logging.FileHandler(settings.LOG_FILE)
+        file_handler.setLevel(logging.ERROR)
+        file_handler.setFormatter(logging.Formatter(
+            settings.LOGGING['formatters']['verbose']['format'], style='{'
+        ))
+        
+        _log_listener = logging.handlers.QueueListener(log_queue, file_handler, respect_handler_level=True)
+        _log_listener.start()
+        atexit.register(_log_listener.stop)
\ No newline at end of file
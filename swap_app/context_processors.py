@@ -1,5 +1,13 @@
+from django.conf import settings
+from django.core.cache import cache
 from .models import Notification
 
+NOTIFICATIONS_CACHE_TIMEOUT = 300
+
+def unread_notifications_cache_key(user_id):
+    """Cache key holding a user's unread notification dropdown"""
+    return f"notif:unread:{user_id}"
+
 def theme_mode(request):
     """Provide dark/light theme mode to templates"""
     dark_mode = request.session.get('dark_mode', False)
@@ -8,21 +16,28 @@ def theme_mode(request):
 def user_notifications(request):
     """Provide unread notifications to templates"""
     if request.user.is_authenticated:
-        notifications = Notification.objects.filter(
-            user=request.user, 
-            is_read=False
-        ).order_by('-created_at')[:10]
+        key = unread_notifications_cache_key(request.user.id)
+        notifications = cache.get(key)
+        if notifications is None:
+            # Cache plain dicts rather than model instances to keep pickles small
+            notifications = list(Notification.objects.filter(
+                user=request.user, 
+                is_read=False
+            ).order_by('-created_at').values('id', 'type', 'message', 'created_at')[:10])
+            cache.set(key, notifications, NOTIFICATIONS_CACHE_TIMEOUT)
         return {'notifications': notifications}
     return {'notifications': []}
 
+# Only changes on process restart, so build it once instead of per render
+_PLATFORM_INFO = {
+    'min_swap_amount': getattr(settings, 'MIN_SWAP_AMOUNT', 50),
+    'max_swap_amount': getattr(settings, 'MAX_SWAP_AMOUNT', 50000),
+    'enable_kyc': getattr(settings, 'ENABLE_KYC', True),
+    'platform_fee_rate': '0.15%',
+    'agent_fee_rate': '0.45%',
+    'total_fee_rate': '0.6%',
+}
+
 def platform_info(request):
     """Provide platform information to templates"""
-    from django.conf import settings
-    return {
-        'min_swap_amount': getattr(settings, 'MIN_SWAP_AMOUNT', 50),
-        'max_swap_amount': getattr(settings, 'MAX_SWAP_AMOUNT', 50000),
-        'enable_kyc': getattr(settings, 'ENABLE_KYC', True),
-        'platform_fee_rate': '0.15%',
-        'agent_fee_rate': '0.45%',
-        'total_fee_rate': '0.6%',
-    }
\ No newline at end of file
+    return _PLATFORM_INFO
\ No newline at end of file
@@ -1,8 +1,29 @@
 from django import forms
 from django.contrib.auth.forms import UserCreationForm
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from decimal import Decimal
-from .models import User, SwapRequest, ProofUpload, Dispute
+from .models import User, Agent, SwapRequest, ProofUpload, Dispute
+
+MOBILE_PREFIXES = frozenset(('088', '099', '098'))
+WALLET_PREFIXES = {
+    'TNM': frozenset(('088',)),
+    'AIRTEL': frozenset(('099', '098')),
+}
+
+ONLINE_AGENTS_CACHE_KEY = 'online_agents'
+ONLINE_AGENTS_CACHE_TIMEOUT = 15
+
+def _online_agent_choices():
+    """(agent_id, username) pairs for verified online agents, cached briefly"""
+    return cache.get_or_set(
+        ONLINE_AGENTS_CACHE_KEY,
+        lambda: list(Agent.objects.filter(
+            verified=True,
+            is_online=True
+        ).values_list('id', 'user__username')),
+        ONLINE_AGENTS_CACHE_TIMEOUT
+    )
 
 class CustomUserCreationForm(UserCreationForm):
     phone_number = forms.CharField(max_length=15, required=True)
@@ -18,13 +39,13 @@ class CustomUserCreationForm(UserCreationForm):
     
     def clean_phone_number(self):
         phone_number = self.cleaned_data['phone_number']
-        if not phone_number.startswith(('088', '099', '098')):
+        if phone_number[:3] not in MOBILE_PREFIXES:
             raise ValidationError("Please enter a valid Malawi mobile number (starts with 088, 099, or 098)")
         return phone_number
 
 class SwapRequestForm(forms.ModelForm):
     agent = forms.ModelChoiceField(
-        queryset=User.objects.none(),
+        queryset=Agent.objects.none(),
         empty_label="Select an agent",
         widget=forms.Select(attrs={'class': 'form-select'})
     )
@@ -51,12 +72,13 @@ class SwapRequestForm(forms.ModelForm):
         user = kwargs.pop('user', None)
         super().__init__(*args, **kwargs)
         if user:
-            # Only show verified, online agents with capacity
-            from .models import Agent
-            self.fields['agent'].queryset = User.objects.filter(
-                agent__verified=True,
-                agent__is_online=True
-            ).select_related('agent')
+            # Only show verified, online agents with capacity. The queryset is
+            # only hit to validate the submitted pk; rendering uses cached choices.
+            self.fields['agent'].queryset = Agent.objects.filter(
+                verified=True,
+                is_online=True
+            )
+            self.fields['agent'].choices = [('', 'Select an agent')] + _online_agent_choices()
     
     def clean_amount(self):
         amount = self.cleaned_data['amount']
@@ -85,9 +107,10 @@ class SwapRequestForm(forms.ModelForm):
         dest_number = self.cleaned_data['dest_number']
         to_service = self.cleaned_data.get('to_service')
         
-        if to_service == 'TNM' and not dest_number.startswith('088'):
-            raise ValidationError("TNM Mpamba numbers must start with 088")
-        elif to_service == 'AIRTEL' and not dest_number.startswith(('099', '098')):
+        prefixes = WALLET_PREFIXES.get(to_service)
+        if prefixes is not None and dest_number[:3] not in prefixes:
+            if to_service == 'TNM':
+                raise ValidationError("TNM Mpamba numbers must start with 088")
             raise ValidationError("Airtel Money numbers must start with 099 or 098")
             
         return dest_number
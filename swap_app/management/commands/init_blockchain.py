@@ -1,10 +1,20 @@
+from django.core.cache import cache
 from django.core.management.base import BaseCommand
-from swap_app.services.blockchain_service import BlockchainService
-from swap_app.models import Block
+from django.db import transaction
+from django.utils import timezone
+from swap_app.services.blockchain_service import get_blockchain_service, LATEST_BLOCK_CACHE_KEY
+from swap_app.models import Block, BlockchainEvent, User
 
 class Command(BaseCommand):
     help = 'Initialize blockchain with genesis block'
     
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Reinitialize an existing blockchain without prompting',
+        )
+    
     def handle(self, *args, **options):
         self.stdout.write("⛓️  Initializing MoneySwap Blockchain...")
         
@@ -15,28 +25,32 @@ class Command(BaseCommand):
             self.stdout.write(self.style.WARNING(
                 f'Blockchain already exists with {existing_blocks} blocks'
             ))
-            if input('Reinitialize? (y/N): ').lower() != 'y':
+            if not options['force'] and input('Reinitialize? (y/N): ').lower() != 'y':
                 self.stdout.write('Aborted.')
                 return
         
-        # Clear existing blocks
-        Block.objects.all().delete()
-        self.stdout.write('🗑️  Cleared existing blockchain data')
-        
         # Initialize blockchain service
-        blockchain_service = BlockchainService()
+        blockchain_service = get_blockchain_service()
         
-        # Create genesis block
-        genesis_block = blockchain_service._create_genesis_block()
+        # Clear and re-seed in one transaction so readers never see an empty
+        # chain. Raw deletes skip Django's per-row collector; events go first
+        # since they reference blocks.
+        with transaction.atomic():
+            BlockchainEvent.objects.all()._raw_delete(BlockchainEvent.objects.db)
+            Block.objects.all()._raw_delete(Block.objects.db)
+            # post_delete doesn't fire for raw deletes; the new genesis block's
+            # post_save re-publishes the tip after this clear, both on commit
+            transaction.on_commit(lambda: cache.delete(LATEST_BLOCK_CACHE_KEY))
+            self.stdout.write('🗑️  Cleared existing blockchain data')
+            
+            # Create genesis block
+            genesis_block = blockchain_service._create_genesis_block()
         
         self.stdout.write(self.style.SUCCESS(
             f'✅ Created genesis block: {genesis_block.block_hash}'
         ))
         
         # Add some sample events to demonstrate the system
-        from swap_app.models import User, Agent
-        from django.utils import timezone
-        
         try:
             # Get admin user for sample events
             admin_user = User.objects.filter(is_superuser=True).first()
@@ -1,9 +1,13 @@
 from django.core.management.base import BaseCommand
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
 from swap_app.models import Agent
 
 User = get_user_model()
 
+# Shared development password for every seeded agent
+SEED_PASSWORD = 'agent123'
+
 class Command(BaseCommand):
     help = 'Seed initial agent data for development'
     
@@ -47,38 +51,55 @@ class Command(BaseCommand):
             },
         ]
         
-        for agent_data in agents_data:
-            user, created = User.objects.get_or_create(
+        usernames = [agent_data['username'] for agent_data in agents_data]
+        existing = set(User.objects.filter(
+            username__in=usernames
+        ).values_list('username', flat=True))
+        
+        new_data = [a for a in agents_data if a['username'] not in existing]
+        
+        # At most one KDF run per seed, and none when every agent exists;
+        # kept out of module scope so importing the command stays cheap
+        password = make_password(SEED_PASSWORD) if new_data else None
+        
+        User.objects.bulk_create([
+            User(
                 username=agent_data['username'],
-                defaults={
-                    'email': agent_data['email'],
-                    'phone_number': agent_data['phone_number'],
-                    'location_address': agent_data['location_address'],
-                    'location_lat': agent_data['location_lat'],
-                    'location_lng': agent_data['location_lng'],
-                    'role': 'agent',
-                    'is_verified': True,
-                }
+                email=agent_data['email'],
+                phone_number=agent_data['phone_number'],
+                location_address=agent_data['location_address'],
+                location_lat=agent_data['location_lat'],
+                location_lng=agent_data['location_lng'],
+                role='agent',
+                is_verified=True,
+                password=password,
             )
-            
-            if created:
-                user.set_password('agent123')
-                user.save()
-                
-                agent = Agent.objects.get(user=user)
-                agent.bank_name = agent_data['bank_name']
-                agent.bank_account = agent_data['bank_account']
-                agent.mpamba_number = agent_data['mpamba_number']
-                agent.airtel_number = agent_data['airtel_number']
-                agent.verified = True
-                agent.is_online = True
-                agent.trust_level = 'trusted'
-                agent.save()
-                
+            for agent_data in new_data
+        ])
+        
+        # bulk_create skips post_save, so the agent profiles are built here
+        user_ids = dict(User.objects.filter(
+            username__in=[a['username'] for a in new_data]
+        ).values_list('username', 'id'))
+        Agent.objects.bulk_create([
+            Agent(
+                user_id=user_ids[agent_data['username']],
+                bank_name=agent_data['bank_name'],
+                bank_account=agent_data['bank_account'],
+                mpamba_number=agent_data['mpamba_number'],
+                airtel_number=agent_data['airtel_number'],
+                verified=True,
+                is_online=True,
+            )
+            for agent_data in new_data
+        ])
+        
+        for username in usernames:
+            if username in existing:
                 self.stdout.write(
-                    self.style.SUCCESS(f'Created agent: {agent_data["username"]}')
+                    self.style.WARNING(f'Agent already exists: {username}')
                 )
             else:
                 self.stdout.write(
-                    self.style.WARNING(f'Agent already exists: {agent_data["username"]}')
+                    self.style.SUCCESS(f'Created agent: {username}')
                 )
\ No newline at end of file
@@ -0,0 +1,45 @@
+from django.conf import settings
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.middleware.cache import FetchFromCacheMiddleware, UpdateCacheMiddleware
+from django.utils import timezone
+from .utils.time import set_now, reset_now
+
+
+def _is_personal(request):
+    """True for requests whose pages may show per-user state"""
+    user = getattr(request, 'user', None)
+    return (
+        (user is not None and user.is_authenticated)
+        or settings.SESSION_COOKIE_NAME in request.COOKIES
+        or CookieStorage.cookie_name in request.COOKIES
+    )
+
+
+class AnonymousFetchFromCacheMiddleware(FetchFromCacheMiddleware):
+    """Serve cached pages only to visitors without a session or messages"""
+    
+    def process_request(self, request):
+        if _is_personal(request):
+            request._cache_update_cache = False
+            return None
+        return super().process_request(request)
+
+
+class AnonymousUpdateCacheMiddleware(UpdateCacheMiddleware):
+    """Never store a page rendered for a logged-in user or a session"""
+    
+    def _should_update_cache(self, request, response):
+        return super()._should_update_cache(request, response) and not _is_personal(request)
+
+class RequestNowMiddleware:
+    """Pin swap_app.utils.time.now() for the duration of each request"""
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+    
+    def __call__(self, request):
+        token = set_now(timezone.now())
+        try:
+            return self.get_response(request)
+        finally:
+            reset_now(token)
\ No newline at end of file
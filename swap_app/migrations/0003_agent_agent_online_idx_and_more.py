@@ -0,0 +1,25 @@
+# Generated by Django 5.2.7 on 2025-11-20 09:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('swap_app', '0002_remove_transactionlog_swap_agent_is_online_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='agent',
+            index=models.Index(condition=models.Q(('is_online', True), ('verified', True)), fields=['id'], name='agent_online_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', 'is_read', '-created_at'], name='notif_unread_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='swaprequest',
+            index=models.Index(fields=['status'], name='swap_status_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2025-11-20 10:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('swap_app', '0003_agent_agent_online_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='swaprequest',
+            name='net_amount',
+            field=models.GeneratedField(db_persist=True, expression=models.F('amount') - models.F('platform_fee') - models.F('agent_fee'), output_field=models.DecimalField(decimal_places=2, max_digits=14)),
+        ),
+    ]
\ No newline at end of file
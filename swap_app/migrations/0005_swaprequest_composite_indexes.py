@@ -0,0 +1,37 @@
+# Generated by Django 5.2.7 on 2025-11-20 10:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('swap_app', '0004_swaprequest_net_amount'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='notification',
+            name='notif_unread_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='swaprequest',
+            name='swap_status_idx',
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('is_read', False)), fields=['user', 'is_read', '-created_at'], name='notif_unread_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='swaprequest',
+            index=models.Index(fields=['status', '-created_at'], name='swap_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='swaprequest',
+            index=models.Index(fields=['client', '-created_at'], name='swap_client_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='swaprequest',
+            index=models.Index(fields=['agent', '-created_at'], name='swap_agent_created_idx'),
+        ),
+    ]
\ No newline at end of file
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2025-11-20 11:47
+
+import swap_app.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('swap_app', '0005_swaprequest_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='swaprequest',
+            name='reference',
+            field=models.CharField(default=swap_app.models.generate_swap_reference, max_length=32, unique=True),
+        ),
+    ]
\ No newline at end of file
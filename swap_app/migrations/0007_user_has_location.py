@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2025-11-20 12:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('swap_app', '0006_alter_swaprequest_reference'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='has_location',
+            field=models.GeneratedField(db_persist=True, expression=models.Q(('location_lat__isnull', False), ('location_lng__isnull', False)), output_field=models.BooleanField()),
+        ),
+    ]
\ No newline at end of file
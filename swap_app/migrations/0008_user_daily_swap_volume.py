@@ -0,0 +1,39 @@
+# Generated by Django 5.2.7 on 2025-11-21 08:40
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_daily_swap_volume(apps, schema_editor):
+    User = apps.get_model('swap_app', 'User')
+    SwapRequest = apps.get_model('swap_app', 'SwapRequest')
+    today = timezone.localdate()
+    todays_swaps = SwapRequest.objects.filter(created_at__date=today)
+    volumes = todays_swaps.filter(
+        client=models.OuterRef('pk')
+    ).order_by().values('client').annotate(s=models.Sum('amount')).values('s')
+    User.objects.filter(pk__in=todays_swaps.values('client')).update(
+        daily_swap_volume=models.Subquery(volumes),
+        daily_swap_date=today,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('swap_app', '0007_user_has_location'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='daily_swap_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='daily_swap_volume',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=14),
+        ),
+        migrations.RunPython(backfill_daily_swap_volume, migrations.RunPython.noop),
+    ]
\ No newline at end of file
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2025-11-21 10:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('swap_app', '0008_user_daily_swap_volume'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='swaprequest',
+            name='agent_proof_verified',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='swaprequest',
+            name='client_proof_verified',
+            field=models.BooleanField(default=False),
+        ),
+    ]
\ No newline at end of file
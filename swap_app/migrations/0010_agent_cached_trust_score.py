@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2025-11-21 11:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('swap_app', '0009_swaprequest_proof_verified_flags'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='agent',
+            name='cached_trust_score',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
\ No newline at end of file
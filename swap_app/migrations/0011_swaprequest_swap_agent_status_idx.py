@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2025-11-21 11:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('swap_app', '0010_agent_cached_trust_score'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='swaprequest',
+            index=models.Index(fields=['agent', 'status', 'created_at'], name='swap_agent_status_idx'),
+        ),
+    ]
\ No newline at end of file
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2025-11-21 14:05
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def backfill_total_swaps(apps, schema_editor):
+    Agent = apps.get_model('swap_app', 'Agent')
+    SwapRequest = apps.get_model('swap_app', 'SwapRequest')
+    counts = SwapRequest.objects.filter(
+        agent=models.OuterRef('pk')
+    ).order_by().values('agent').annotate(c=models.Count('pk')).values('c')
+    Agent.objects.update(total_swaps=Coalesce(models.Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('swap_app', '0011_swaprequest_swap_agent_status_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='agent',
+            name='total_swaps',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_total_swaps, migrations.RunPython.noop),
+    ]
\ No newline at end of file
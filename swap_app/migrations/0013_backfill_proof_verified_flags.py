@@ -0,0 +1,40 @@
+# Generated by Django 5.2.7 on 2025-11-21 14:30
+
+from django.db import migrations
+
+
+BACKFILL_SQL = """
+UPDATE swap_app_swaprequest SET
+    client_proof_verified = EXISTS(
+        SELECT 1 FROM swap_app_proofupload p
+        WHERE p.swap_request_id = swap_app_swaprequest.id
+          AND p.uploaded_by_id = swap_app_swaprequest.client_id
+          AND p.status = 'verified'
+    ),
+    agent_proof_verified = EXISTS(
+        SELECT 1 FROM swap_app_proofupload p
+        JOIN swap_app_agent a ON a.user_id = p.uploaded_by_id
+        WHERE p.swap_request_id = swap_app_swaprequest.id
+          AND a.id = swap_app_swaprequest.agent_id
+          AND p.status = 'verified'
+    )
+"""
+
+
+def backfill_proof_verified_flags(apps, schema_editor):
+    # ProofUpload isn't in the migration state, so use SQL; skip databases
+    # that never had the table (no proofs means the False defaults are right)
+    if 'swap_app_proofupload' not in schema_editor.connection.introspection.table_names():
+        return
+    schema_editor.execute(BACKFILL_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('swap_app', '0012_agent_total_swaps'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_proof_verified_flags, migrations.RunPython.noop),
+    ]
\ No newline at end of file
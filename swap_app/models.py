@@ -1,10 +1,30 @@
 from django.db import models
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import AbstractUser
 from django.utils import timezone
+from django.utils.functional import cached_property
+from django.utils.crypto import get_random_string
 import uuid
 import os
 import math
+import string
 from decimal import Decimal
+from .utils import time as clock
+
+# experience_score reaches 100 at 50 completed swaps: log(1 + 50) / log(51)
+_INV_LOG51 = 1.0 / math.log(51)
+
+# Component weights for Agent.trust_score (also used by TrustScoreService)
+TRUST_SCORE_WEIGHTS = {
+    'response_time': 0.2,
+    'completion_rate': 0.3,
+    'rating': 0.3,
+    'experience': 0.2,
+}
+
+def generate_swap_reference():
+    """Short code clients quote in bank narrations, e.g. SWAP7K2Q9XDM"""
+    return f"SWAP{get_random_string(8, allowed_chars=string.ascii_uppercase + string.digits)}"
 
 def proof_upload_path(instance, filename):
     """Generate upload path for proof files"""
@@ -31,8 +51,17 @@ class User(AbstractUser):
     location_lat = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
     location_lng = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
     location_address = models.CharField(max_length=255, blank=True)
+    # Stored so map/recommendation filters hit one boolean column
+    has_location = models.GeneratedField(
+        expression=models.Q(location_lat__isnull=False, location_lng__isnull=False),
+        output_field=models.BooleanField(),
+        db_persist=True,
+    )
     daily_swap_limit = models.DecimalField(max_digits=14, decimal_places=2, default=20000)
     max_swap_amount = models.DecimalField(max_digits=14, decimal_places=2, default=5000)
+    # Running total of swaps created on daily_swap_date, bumped by SwapRequest.save()
+    daily_swap_volume = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    daily_swap_date = models.DateField(null=True, blank=True)
     
     # Fix reverse accessor clashes
     groups = models.ManyToManyField(
@@ -55,17 +84,32 @@ class User(AbstractUser):
     def __str__(self):
         return f"{self.username} ({self.role})"
     
-    @property
-    def has_location(self):
-        return bool(self.location_lat and self.location_lng)
-    
     @property
     def todays_swap_volume(self):
-        """Calculate today's total swap volume"""
-        today = timezone.now().date()
-        return self.swap_requests.filter(
-            created_at__date=today
-        ).aggregate(models.Sum('amount'))['amount__sum'] or 0
+        """Today's total swap volume; the stored counter resets lazily at midnight"""
+        if self.daily_swap_date != clock.localdate():
+            return 0
+        return self.daily_swap_volume
+
+# Swap statuses that count against an agent's daily capacity
+DAILY_CAPACITY_STATUSES = ['ACCEPTED', 'CLIENT_PROOF_UPLOADED', 'AGENT_PROOF_UPLOADED']
+
+# Services the client pays into through the agent's bank account
+BANK_SERVICES = frozenset({'national_bank', 'standard_bank', 'fdh_bank', 'nedbank'})
+
+class AgentQuerySet(models.QuerySet):
+    def with_stats(self):
+        """Annotate the swap count can_accept_swap would query per agent"""
+        today_swaps = SwapRequest.objects.filter(
+            agent=models.OuterRef('pk'),
+            created_at__date=clock.localdate(),
+            status__in=DAILY_CAPACITY_STATUSES,
+        ).order_by()
+        return self.annotate(
+            _today_capacity_swaps=Coalesce(models.Subquery(
+                today_swaps.values('agent').annotate(c=models.Count('pk')).values('c')
+            ), 0),
+        )
 
 class Agent(models.Model):
     TRUST_LEVELS = (
@@ -100,48 +144,67 @@ class Agent(models.Model):
     dispute_count = models.IntegerField(default=0)
     total_rating = models.FloatField(default=0)
     rating_count = models.IntegerField(default=0)
+    # Bumped by SwapRequest.save() for every new swap assigned to the agent
+    total_swaps = models.IntegerField(default=0)
+    # Snapshot of trust_score for SQL ordering, refreshed in bulk by
+    # TrustScoreService.refresh_all()
+    cached_trust_score = models.FloatField(null=True, blank=True)
+    
+    objects = AgentQuerySet.as_manager()
+    
+    class Meta:
+        indexes = [
+            # Partial index: online verified agents are a small minority of rows
+            models.Index(fields=['id'], condition=models.Q(verified=True, is_online=True), name='agent_online_idx'),
+        ]
+    
+    # cached_property scores, memoized per instance for the request
+    SCORE_ATTRS = (
+        'average_response_time', 'completion_rate', 'average_rating',
+        'experience_score', 'trust_score', 'trust_level',
+    )
     
     def __str__(self):
         return f"Agent: {self.user.username}"
     
-    @property
+    def save(self, *args, **kwargs):
+        # Metrics may have changed; recompute scores on next access
+        for attr in self.SCORE_ATTRS:
+            self.__dict__.pop(attr, None)
+        super().save(*args, **kwargs)
+    
+    @cached_property
     def average_response_time(self):
         """Calculate average response time in minutes"""
         if self.response_count == 0:
             return self.response_time
         return (self.total_response_time / self.response_count) / 60
     
-    @property
+    @cached_property
     def completion_rate(self):
         """Calculate completion rate percentage"""
-        total_swaps = self.swap_requests.count()
-        if total_swaps == 0:
+        if self.total_swaps == 0:
             return 100.0
-        return (self.completed_swaps / total_swaps) * 100
+        return (self.completed_swaps / self.total_swaps) * 100
     
-    @property
+    @cached_property
     def average_rating(self):
         """Calculate average rating"""
         if self.rating_count == 0:
             return self.rating
         return self.total_rating / self.rating_count
     
-    @property
+    @cached_property
     def experience_score(self):
         """Calculate experience based on completed swaps"""
         if self.completed_swaps == 0:
             return 0
-        return min(100, (math.log(self.completed_swaps + 1) / math.log(51)) * 100)
+        return min(100, math.log1p(self.completed_swaps) * _INV_LOG51 * 100)
     
-    @property
+    @cached_property
     def trust_score(self):
         """Calculate overall trust score (0-100%)"""
-        weights = {
-            'response_time': 0.2,
-            'completion_rate': 0.3,
-            'rating': 0.3,
-            'experience': 0.2,
-        }
+        weights = TRUST_SCORE_WEIGHTS
         
         # Response time score (faster = better)
         response_score = max(0, 100 - (self.average_response_time * 2))
@@ -170,7 +233,7 @@ class Agent(models.Model):
         
         return round(trust_score, 1)
     
-    @property
+    @cached_property
     def trust_level(self):
         """Get human-readable trust level"""
         score = self.trust_score
@@ -185,19 +248,48 @@ class Agent(models.Model):
         else:
             return "Needs Improvement"
     
+    @property
+    def location_data(self):
+        """Map marker data for this agent, or None when the agent has no location.
+        
+        Reads self.user once; iterate over with_location_qs() (or any
+        select_related('user') queryset) to avoid a query per agent. The two
+        float() conversions are noise next to that, so there is no batched path.
+        """
+        u = self.user
+        if not u.has_location:
+            return None
+        return {
+            'id': self.id,
+            'username': u.username,
+            'lat': float(u.location_lat),
+            'lng': float(u.location_lng),
+            'address': u.location_address,
+        }
+    
+    @classmethod
+    def with_location_qs(cls):
+        """Agents whose user has coordinates, with the user joined in"""
+        return cls.objects.select_related('user').filter(user__has_location=True)
+    
     @property
     def can_accept_swap(self):
         """Check if agent can accept new swaps based on daily limit"""
-        today = timezone.now().date()
-        today_swaps = self.swap_requests.filter(
-            created_at__date=today,
-            status__in=['ACCEPTED', 'CLIENT_PROOF_UPLOADED', 'AGENT_PROOF_UPLOADED']
-        ).count()
-        return today_swaps < self.max_daily_swaps
+        today_swaps = getattr(self, '_today_capacity_swaps', None)
+        if today_swaps is not None:
+            return today_swaps < self.max_daily_swaps
+        if self.max_daily_swaps <= 0:
+            return False
+        # Only whether the limit is reached matters, so stop at the
+        # max_daily_swaps-th row instead of counting them all
+        return not self.swap_requests.filter(
+            created_at__date=clock.localdate(),
+            status__in=DAILY_CAPACITY_STATUSES
+        )[self.max_daily_swaps - 1:self.max_daily_swaps].exists()
     
     def get_payment_details(self, service_type):
         """Get agent's payment details for direct client transfer"""
-        if service_type in ['national_bank', 'standard_bank', 'fdh_bank', 'nedbank']:
+        if service_type in BANK_SERVICES:
             return {
                 'type': 'bank',
                 'bank_name': self.bank_name,
@@ -218,22 +310,41 @@ class Agent(models.Model):
             }
         return None
     
+    def get_payment_instruction(self, service_type):
+        """One-line 'Send to: ...' text for SMS, or None for unknown services"""
+        if service_type in BANK_SERVICES:
+            return f"Send to: {self.bank_name} Acc: {self.bank_account}"
+        elif service_type == 'TNM':
+            return f"Send to: TNM Mpamba {self.mpamba_number}"
+        elif service_type == 'AIRTEL':
+            return f"Send to: Airtel Money {self.airtel_number}"
+        return None
+    
+    def _increment(self, **deltas):
+        """Atomically add deltas to metric columns and mirror them on self"""
+        Agent.objects.filter(pk=self.pk).update(
+            **{field: models.F(field) + delta for field, delta in deltas.items()}
+        )
+        for field, delta in deltas.items():
+            setattr(self, field, getattr(self, field) + delta)
+        for attr in self.SCORE_ATTRS:
+            self.__dict__.pop(attr, None)
+    
     def update_response_time(self, response_time_seconds):
         """Update average response time"""
-        self.total_response_time += response_time_seconds
-        self.response_count += 1
-        self.save()
+        self._increment(total_response_time=response_time_seconds, response_count=1)
     
     def update_rating(self, new_rating):
         """Update average rating"""
-        self.total_rating += new_rating
-        self.rating_count += 1
-        self.save()
+        self._increment(total_rating=new_rating, rating_count=1)
     
     def add_dispute(self):
         """Increment dispute count"""
-        self.dispute_count += 1
-        self.save()
+        self._increment(dispute_count=1)
+    
+    def record_completion(self):
+        """Increment completed swap count"""
+        self._increment(completed_swaps=1)
 
 class KYCDocument(models.Model):
     DOCUMENT_TYPES = (
@@ -262,6 +373,11 @@ class KYCDocument(models.Model):
     def __str__(self):
         return f"{self.user.username} - {self.get_document_type_display()}"
 
+class SwapRequestQuerySet(models.QuerySet):
+    def with_parties(self):
+        """Join client and agent user so listings can show both names"""
+        return self.select_related('client', 'agent__user')
+
 class SwapRequest(models.Model):
     STATUS_CHOICES = (
         ('PENDING', 'Pending Agent Acceptance'),
@@ -297,11 +413,17 @@ class SwapRequest(models.Model):
     to_service = models.CharField(max_length=10, choices=WALLET_CHOICES)
     dest_number = models.CharField(max_length=20)
     status = models.CharField(max_length=25, choices=STATUS_CHOICES, default='PENDING')
-    reference = models.CharField(max_length=32, unique=True)
+    reference = models.CharField(max_length=32, unique=True, default=generate_swap_reference)
     
     # Fees (for reporting and invoicing only - no real-time collection)
     platform_fee = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     agent_fee = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    # Maintained by the database so reports can filter and SUM() it in SQL
+    net_amount = models.GeneratedField(
+        expression=models.F('amount') - models.F('platform_fee') - models.F('agent_fee'),
+        output_field=models.DecimalField(max_digits=14, decimal_places=2),
+        db_persist=True,
+    )
     
     # Timing fields
     agent_response_at = models.DateTimeField(null=True, blank=True)
@@ -309,39 +431,79 @@ class SwapRequest(models.Model):
     agent_proof_uploaded_at = models.DateTimeField(null=True, blank=True)
     completed_at = models.DateTimeField(null=True, blank=True)
     
+    # Denormalized from ProofUpload, kept in sync by refresh_proof_flags()
+    client_proof_verified = models.BooleanField(default=False)
+    agent_proof_verified = models.BooleanField(default=False)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = SwapRequestQuerySet.as_manager()
+    
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', '-created_at'], name='swap_status_created_idx'),
+            models.Index(fields=['client', '-created_at'], name='swap_client_created_idx'),
+            models.Index(fields=['agent', '-created_at'], name='swap_agent_created_idx'),
+            # can_accept_swap / with_stats: agent + status__in + created_at__date
+            models.Index(fields=['agent', 'status', 'created_at'], name='swap_agent_status_idx'),
+        ]
     
     def __str__(self):
         return f"Swap {self.reference} - {self.amount}"
     
-    @property
-    def net_amount(self):
-        return self.amount - (self.platform_fee + self.agent_fee)
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Stored status, so the pre_save signal can spot changes without a query
+        if 'status' in instance.__dict__:
+            instance._loaded_status = instance.status
+        return instance
+    
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        super().save(*args, **kwargs)
+        self._loaded_status = self.status
+        if adding:
+            # Atomic bump of the client's daily volume, restarting on a new day
+            today = clock.localdate()
+            User.objects.filter(pk=self.client_id).update(
+                daily_swap_volume=models.Case(
+                    models.When(daily_swap_date=today, then=models.F('daily_swap_volume') + self.amount),
+                    default=models.Value(self.amount),
+                    output_field=models.DecimalField(max_digits=14, decimal_places=2),
+                ),
+                daily_swap_date=today,
+            )
+            Agent.objects.filter(pk=self.agent_id).update(total_swaps=models.F('total_swaps') + 1)
+    
+    def refresh_proof_flags(self):
+        """Recompute client/agent_proof_verified from this swap's verified proofs"""
+        uploaders = set(
+            self.proofs.filter(status='verified').values_list('uploaded_by_id', flat=True)
+        )
+        self.client_proof_verified = self.client_id in uploaders
+        self.agent_proof_verified = self.agent.user_id in uploaders
+        SwapRequest.objects.filter(pk=self.pk).update(
+            client_proof_verified=self.client_proof_verified,
+            agent_proof_verified=self.agent_proof_verified,
+        )
     
     @property
     def has_client_proof(self):
-        return self.proofs.filter(
-            uploaded_by=self.client, 
-            status='verified'
-        ).exists()
+        return self.client_proof_verified
     
     @property
     def has_agent_proof(self):
-        return self.proofs.filter(
-            uploaded_by=self.agent.user, 
-            status='verified'
-        ).exists()
+        return self.agent_proof_verified
     
     @property
     def is_expired(self):
         if self.status == 'PENDING':
-            return timezone.now() > self.created_at + timezone.timedelta(minutes=30)
+            return clock.now() > self.created_at + timezone.timedelta(minutes=30)
         elif self.status == 'ACCEPTED':
-            return timezone.now() > self.agent_response_at + timezone.timedelta(hours=2)
+            return clock.now() > self.agent_response_at + timezone.timedelta(hours=2)
         return False
 
 class ProofUpload(models.Model):
@@ -379,6 +541,11 @@ class ProofUpload(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # refresh_proof_flags(): a swap's verified proofs
+            models.Index(fields=['swap_request', 'status'], name='proof_swap_status_idx'),
+            models.Index(fields=['uploaded_by', 'status'], name='proof_uploader_status_idx'),
+        ]
     
     def __str__(self):
         return f"Proof for {self.swap_request.reference}"
@@ -478,5 +645,11 @@ class Notification(models.Model):
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     
+    class Meta:
+        indexes = [
+            # Partial: only unread rows are ever looked up by this predicate
+            models.Index(fields=['user', 'is_read', '-created_at'], condition=models.Q(is_read=False), name='notif_unread_idx'),
+        ]
+    
     def __str__(self):
         return f"Notification for {self.user.username} - {self.type}"
\ No newline at end of file
@@ -1,14 +1,62 @@
 import hashlib
 import json
+import threading
 from datetime import datetime
-from django.utils import timezone
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max
 from ..models import Block, BlockchainEvent
+from ..utils import time as clock
+
+# json.dumps builds a fresh JSONEncoder whenever non-default options such as
+# sort_keys are passed; reuse one instead. Output is byte-identical, so
+# existing payload hashes stay reproducible.
+_HASH_ENCODER = json.JSONEncoder(sort_keys=True)
+
+# Chain tip summary for display (health checks, status pages). The Block
+# signals keep it in step; the TTL bounds staleness when the chain changes
+# behind the cache's back (per-process LocMem in dev, DB restores, manual
+# edits). Writes never use it - they read the tip from the DB.
+LATEST_BLOCK_CACHE_KEY = 'blockchain:tip'
+LATEST_BLOCK_CACHE_TIMEOUT = 300
+
+def _block_summary(block):
+    return {'id': block.id, 'index': block.index, 'hash': block.block_hash}
+
+def cache_latest_block(block):
+    cache.set(LATEST_BLOCK_CACHE_KEY, _block_summary(block), LATEST_BLOCK_CACHE_TIMEOUT)
+
+def get_latest_block_summary():
+    """Return {'id', 'index', 'hash'} for the chain tip, or None if there are no blocks"""
+    latest = cache.get(LATEST_BLOCK_CACHE_KEY)
+    if latest is None:
+        block = Block.objects.only('index', 'block_hash').order_by('-index').first()
+        if block is None:
+            return None
+        latest = _block_summary(block)
+        # add, not set: never overwrite a tip a newer block published meanwhile,
+        # and only once our view of the chain is committed
+        transaction.on_commit(lambda: cache.add(LATEST_BLOCK_CACHE_KEY, latest, LATEST_BLOCK_CACHE_TIMEOUT))
+    return latest
+
+_service = None
+_service_lock = threading.Lock()
+
+def get_blockchain_service():
+    """Shared BlockchainService; it keeps no chain state between calls"""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = BlockchainService()
+    return _service
 
 class BlockchainService:
     """Service for blockchain operations - Enhanced for no-money-holding model"""
     
     def __init__(self):
         self.difficulty = 4
+        self._genesis_lock = threading.Lock()
     
     def record_swap_created(self, swap, actor):
         """Record swap creation - no money involved"""
@@ -20,7 +68,7 @@ class BlockchainService:
             'from_service': swap.from_service,
             'to_service': swap.to_service,
             'calculated_fee': float(swap.platform_fee + swap.agent_fee),
-            'timestamp': str(timezone.now()),
+            'timestamp': str(clock.now()),
             'money_flow': 'direct_client_to_agent',  # Important: no platform holding
             'legal_note': 'platform_does_not_hold_funds'
         }
@@ -31,7 +79,7 @@ class BlockchainService:
         event_payload = {
             'swap_ref': swap.reference,
             'agent_response_time': swap.agent_response_at.isoformat(),
-            'timestamp': str(timezone.now()),
+            'timestamp': str(clock.now()),
             'money_flow': 'direct_client_to_agent'
         }
         return self._submit_event('SWAP_RESERVED', swap.reference, event_payload, str(actor.id))
@@ -41,7 +89,7 @@ class BlockchainService:
         event_payload = {
             'swap_ref': swap.reference,
             'client_proof_uploaded_at': swap.client_proof_uploaded_at.isoformat(),
-            'timestamp': str(timezone.now()),
+            'timestamp': str(clock.now()),
             'money_flow': 'direct_client_to_agent',
             'transfer_type': 'client_to_agent_direct'
         }
@@ -52,7 +100,7 @@ class BlockchainService:
         event_payload = {
             'swap_ref': swap.reference,
             'agent_proof_uploaded_at': swap.agent_proof_uploaded_at.isoformat(),
-            'timestamp': str(timezone.now()),
+            'timestamp': str(clock.now()),
             'money_flow': 'direct_agent_to_client',
             'transfer_type': 'agent_to_client_direct'
         }
@@ -65,7 +113,7 @@ class BlockchainService:
             'platform_fee_owed': float(swap.platform_fee),
             'agent_fee_earned': float(swap.agent_fee),
             'settlement_status': 'monthly_invoice',  # Fees settled externally
-            'timestamp': str(timezone.now()),
+            'timestamp': str(clock.now()),
             'money_flow': 'complete_direct_transfer',
             'legal_note': 'fees_settled_externally_no_platform_holding'
         }
@@ -77,61 +125,110 @@ class BlockchainService:
             'swap_ref': dispute.swap_request.reference,
             'reason': dispute.reason,
             'severity': dispute.severity,
-            'timestamp': str(timezone.now())
+            'timestamp': str(clock.now())
         }
         return self._submit_event('DISPUTE_OPENED', dispute.swap_request.reference, event_payload, str(actor.id))
     
     def _submit_event(self, event_type, entity_ref, payload, actor):
         """Submit event to blockchain"""
+        # For prototype, we'll simply store in database
+        # In production, this would involve mining a block
+        return self._store_event(self._build_event_data(event_type, entity_ref, payload, actor))
+    
+    def bulk_record(self, events):
+        """Record many (event_type, entity_ref, payload, actor) events with one INSERT"""
+        # One tip lookup for the whole batch
+        block_id = self._get_latest_block_id()
+        objs = [
+            self._build_event(self._build_event_data(*event), block_id)
+            for event in events
+        ]
+        return BlockchainEvent.objects.bulk_create(objs, batch_size=500)
+    
+    def _build_event_data(self, event_type, entity_ref, payload, actor):
         # Hash the payload
         payload_hash = self._calculate_hash(payload)
         
         # Create event
         event_data = {
             'event_type': event_type,
-            'timestamp': str(timezone.now()),
+            'timestamp': str(clock.now()),
             'entity_ref': entity_ref,
             'payload_hash': payload_hash,
             'actor': actor
         }
-        
-        # For prototype, we'll simply store in database
-        # In production, this would involve mining a block
-        return self._store_event(event_data)
+        return event_data
     
     def _calculate_hash(self, data):
         """Calculate SHA-256 hash of data"""
         if isinstance(data, dict):
-            data = json.dumps(data, sort_keys=True).encode()
+            data = _HASH_ENCODER.encode(data).encode()
         return hashlib.sha256(data).hexdigest()
     
+    @staticmethod
+    def _merkle_root(leaves):
+        """
+        Merkle root of a list of 32-byte digests, e.g. bytes.fromhex() of the
+        events' payload_hash. An odd node at any level is paired with itself.
+        For the block-mining path; events are not batched into blocks yet.
+        """
+        if not leaves:
+            return hashlib.sha256(b'').digest()
+        level = list(leaves)
+        # One 64-byte buffer reused for every left+right pair
+        pair = bytearray(64)
+        sha256 = hashlib.sha256
+        while len(level) > 1:
+            if len(level) % 2:
+                level.append(level[-1])
+            next_level = []
+            for i in range(0, len(level), 2):
+                pair[:32] = level[i]
+                pair[32:] = level[i + 1]
+                next_level.append(sha256(pair).digest())
+            level = next_level
+        return level[0]
+    
+    def _get_latest_block_id(self):
+        """Latest block's pk, read from the DB so new events never point at a stale block"""
+        latest_id = Block.objects.order_by('-index').values_list('pk', flat=True).first()
+        if latest_id is not None:
+            return latest_id
+        with self._genesis_lock:
+            # Empty chain: create genesis block (idempotent if another thread
+            # or process got there first)
+            return self._create_genesis_block().id
+    
     def _store_event(self, event_data):
         """Store event in database (simplified for prototype)"""
-        # Get or create latest block
-        latest_block = Block.objects.order_by('-index').first()
-        if not latest_block:
-            # Create genesis block
-            latest_block = self._create_genesis_block()
-        
+        event = self._build_event(event_data, self._get_latest_block_id())
+        event.save()
+        return event
+    
+    def _build_event(self, event_data, block_id):
         # For prototype, we'll add events to the latest block
         # In production, you would mine a new block
-        event = BlockchainEvent.objects.create(
-            block=latest_block,
-            event_id=f"evt{hashlib.sha256(json.dumps(event_data).encode()).hexdigest()[:16]}",
+        # event_id only needs to be unique, so hash the already-computed
+        # payload hash plus the event metadata directly, without a JSON pass
+        id_source = '|'.join((
+            event_data['event_type'], event_data['timestamp'], event_data['entity_ref'],
+            event_data['payload_hash'], event_data['actor'],
+        ))
+        return BlockchainEvent(
+            block_id=block_id,
+            event_id=f"evt{hashlib.sha256(id_source.encode(), usedforsecurity=False).hexdigest()[:16]}",
             event_type=event_data['event_type'],
             timestamp=event_data['timestamp'],
             entity_ref=event_data['entity_ref'],
             payload_hash=event_data['payload_hash'],
             actor=event_data['actor']
         )
-        
-        return event
     
     def _create_genesis_block(self):
-        """Create the first block in the chain"""
+        """Create the first block in the chain, or return it if it exists"""
         genesis_data = {
             "index": 0,
-            "timestamp": str(timezone.now()),
+            "timestamp": str(clock.now()),
             "previous_hash": "0" * 64,
             "events": [],
             "message": "MoneySwap Genesis Block - No Money Holding Model",
@@ -140,37 +237,45 @@ class BlockchainService:
         
         block_hash = self._calculate_hash(genesis_data)
         
-        return Block.objects.create(
+        # index is unique, so a concurrent creator's IntegrityError makes
+        # get_or_create fall back to fetching the winner's block
+        block, _ = Block.objects.get_or_create(
             index=0,
-            timestamp=timezone.now(),
-            previous_hash="0" * 64,
-            block_hash=block_hash,
-            nonce=0,
-            node_signature="genesis",
-            validator_signatures=[]
+            defaults={
+                'timestamp': clock.now(),
+                'previous_hash': "0" * 64,
+                'block_hash': block_hash,
+                'nonce': 0,
+                'node_signature': "genesis",
+                'validator_signatures': [],
+            },
         )
+        return block
     
     def get_status(self):
         """Get blockchain status"""
-        latest_block = Block.objects.order_by('-index').first()
+        block_stats = Block.objects.aggregate(max_index=Max('index'), total=Count('pk'))
         total_events = BlockchainEvent.objects.count()
         
         return {
-            'latest_block_index': latest_block.index if latest_block else 0,
-            'total_blocks': Block.objects.count(),
+            'latest_block_index': block_stats['max_index'] or 0,
+            'total_blocks': block_stats['total'],
             'total_events': total_events,
             'integrity_check': self._verify_blockchain_integrity()
         }
     
     def _verify_blockchain_integrity(self):
         """Verify blockchain integrity"""
-        blocks = Block.objects.order_by('index')
+        # Stream hash pairs in constant memory rather than hydrating Blocks
+        rows = Block.objects.order_by('index').values_list(
+            'previous_hash', 'block_hash'
+        ).iterator(chunk_size=2000)
         previous_hash = "0" * 64
         
-        for block in blocks:
-            if block.previous_hash != previous_hash:
+        for block_previous_hash, block_hash in rows:
+            if block_previous_hash != previous_hash:
                 return False
             # In production, you would verify the block hash here
-            previous_hash = block.block_hash
+            previous_hash = block_hash
         
         return True
\ No newline at end of file
@@ -1,41 +1,52 @@
+from functools import lru_cache
+from django.conf import settings
 from django.utils import timezone
 
+# Swap amount limits only change on process restart
+MIN_SWAP_AMOUNT = getattr(settings, 'MIN_SWAP_AMOUNT', 50)
+MAX_SWAP_AMOUNT = getattr(settings, 'MAX_SWAP_AMOUNT', 50000)
+
+@lru_cache(maxsize=1)
+def _terms_of_service():
+    return {
+        'platform_name': 'MoneySwap',
+        'legal_status': 'Technology Service Provider',
+        'key_points': [
+            "MoneySwap acts as a matching service only between clients and agents",
+            "All financial transactions occur directly between users",
+            "Platform never holds, stores, or transfers user funds",
+            "Fees are for matching and verification services only",
+            "Users are responsible for their own financial transactions",
+            "Platform provides dispute resolution as a service",
+            "No escrow services are provided"
+        ],
+        'compliance_notes': [
+            "Not a financial institution under RBM regulations",
+            "Not a payment service provider",
+            "No money transmission services",
+            "No banking or financial services license required",
+            "Operates as technology platform under general business laws"
+        ],
+        'fee_structure': {
+            'total_fee': '0.6% (minimum MWK 50)',
+            'platform_portion': '0.15% (billed monthly via invoice)',
+            'agent_portion': '0.45% (retained by agent)',
+            'settlement': 'Monthly invoicing for platform fees'
+        }
+    }
+
 class ComplianceService:
     """Service to ensure platform operates within legal boundaries - NO MONEY HOLDING"""
     
     @staticmethod
     def generate_terms_of_service():
-        """Generate platform terms emphasizing no money holding"""
-        return {
-            'platform_name': 'MoneySwap',
-            'legal_status': 'Technology Service Provider',
-            'key_points': [
-                "MoneySwap acts as a matching service only between clients and agents",
-                "All financial transactions occur directly between users",
-                "Platform never holds, stores, or transfers user funds",
-                "Fees are for matching and verification services only",
-                "Users are responsible for their own financial transactions",
-                "Platform provides dispute resolution as a service",
-                "No escrow services are provided"
-            ],
-            'compliance_notes': [
-                "Not a financial institution under RBM regulations",
-                "Not a payment service provider",
-                "No money transmission services",
-                "No banking or financial services license required",
-                "Operates as technology platform under general business laws"
-            ],
-            'fee_structure': {
-                'total_fee': '0.6% (minimum MWK 50)',
-                'platform_portion': '0.15% (billed monthly via invoice)',
-                'agent_portion': '0.45% (retained by agent)',
-                'settlement': 'Monthly invoicing for platform fees'
-            }
-        }
+        """Generate platform terms emphasizing no money holding (shared; do not mutate)"""
+        return _terms_of_service()
     
     @staticmethod
     def generate_user_agreement(user):
         """Generate user-specific agreement"""
+        agreement_date = timezone.now().strftime('%Y-%m-%d')
         return f"""
         MONEYSWAP USER AGREEMENT
         
@@ -43,7 +54,7 @@ class ComplianceService:
         - Username: {user.username}
         - Role: {user.get_role_display()}
         - Phone: {user.phone_number}
-        - Agreement Date: {timezone.now().strftime('%Y-%m-%d')}
+        - Agreement Date: {agreement_date}
         
         IMPORTANT TERMS AND CONDITIONS:
         
@@ -90,12 +101,13 @@ class ComplianceService:
         By using this platform, you acknowledge and agree to these terms.
         
         User Signature: _________________________
-        Date: {timezone.now().strftime('%Y-%m-%d')}
+        Date: {agreement_date}
         """
     
     @staticmethod
     def generate_agent_agreement(agent):
         """Generate agent-specific agreement"""
+        agreement_date = timezone.now().strftime('%Y-%m-%d')
         return f"""
         MONEYSWAP AGENT AGREEMENT
         
@@ -103,7 +115,7 @@ class ComplianceService:
         - Username: {agent.user.username}
         - Business Name: {agent.user.get_full_name() or agent.user.username}
         - Phone: {agent.user.phone_number}
-        - Agreement Date: {timezone.now().strftime('%Y-%m-%d')}
+        - Agreement Date: {agreement_date}
         
         AGENT TERMS AND CONDITIONS:
         
@@ -145,7 +157,7 @@ class ComplianceService:
         - Violation of terms of service
         
         Agent Signature: _________________________
-        Date: {timezone.now().strftime('%Y-%m-%d')}
+        Date: {agreement_date}
         """
     
     @staticmethod
@@ -185,26 +197,30 @@ class ComplianceService:
         """
     
     @staticmethod
-    def check_swap_compliance(swap):
-        """Check if swap complies with platform rules"""
+    def check_swap_compliance(swap, fast=False):
+        """
+        Check if swap complies with platform rules.
+        With fast=True, stop at the first violation (cheapest checks run first).
+        """
         violations = []
+        amount = swap.amount
         
         # Amount limits
-        from django.conf import settings
-        min_amount = getattr(settings, 'MIN_SWAP_AMOUNT', 50)
-        max_amount = getattr(settings, 'MAX_SWAP_AMOUNT', 50000)
-        
-        if swap.amount < min_amount:
-            violations.append(f"Amount below minimum: MWK {swap.amount} < MWK {min_amount}")
-        
-        if swap.amount > max_amount:
-            violations.append(f"Amount above maximum: MWK {swap.amount} > MWK {max_amount}")
+        if amount < MIN_SWAP_AMOUNT:
+            violations.append(f"Amount below minimum: MWK {amount} < MWK {MIN_SWAP_AMOUNT}")
+        elif amount > MAX_SWAP_AMOUNT:
+            violations.append(f"Amount above maximum: MWK {amount} > MWK {MAX_SWAP_AMOUNT}")
+        if fast and violations:
+            return False, violations
         
         # User limits
-        if swap.client.todays_swap_volume + swap.amount > swap.client.daily_swap_limit:
+        client = swap.client
+        if client.todays_swap_volume + amount > client.daily_swap_limit:
             violations.append(f"Would exceed client's daily limit")
+            if fast:
+                return False, violations
         
-        # Agent capacity
+        # Agent capacity (may query)
         if not swap.agent.can_accept_swap:
             violations.append("Agent has reached daily swap capacity")
         
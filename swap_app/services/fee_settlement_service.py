@@ -1,22 +1,45 @@
+import calendar
 from datetime import datetime, timedelta
 from django.db.models import Sum, Count
 from decimal import Decimal
 from ..models import SwapRequest, Agent
 
+ZERO = Decimal('0.00')
+
 class FeeSettlementService:
     """Handle monthly fee settlements outside the platform - NO MONEY HOLDING"""
     
     @staticmethod
-    def generate_agent_invoice(agent, month=None):
-        """Generate monthly invoice for agent platform fees"""
+    def _month_window(month=None):
+        """Return (start_date, end_date) bounding the given month, default this month"""
         if month is None:
-            month = datetime.now().replace(day=1)
+            month = datetime.now()
         
         start_date = month.replace(day=1)
-        if month.month == 12:
-            end_date = month.replace(year=month.year+1, month=1, day=1)
-        else:
-            end_date = month.replace(month=month.month+1, day=1)
+        if isinstance(start_date, datetime):
+            # Callers pass datetime.now()-derived values; start at midnight
+            start_date = start_date.replace(hour=0, minute=0, second=0, microsecond=0)
+        days = calendar.monthrange(start_date.year, start_date.month)[1]
+        return start_date, start_date + timedelta(days=days)
+    
+    @staticmethod
+    def _fee_totals(swaps):
+        """Count and fee/volume sums for swaps in one aggregate query"""
+        totals = swaps.aggregate(
+            total_swaps=Count('id'),
+            total_volume=Sum('amount'),
+            total_platform_fee=Sum('platform_fee'),
+            total_agent_fee=Sum('agent_fee'),
+        )
+        for key in ('total_volume', 'total_platform_fee', 'total_agent_fee'):
+            if totals[key] is None:
+                totals[key] = ZERO
+        return totals
+    
+    @staticmethod
+    def generate_agent_invoice(agent, month=None):
+        """Generate monthly invoice for agent platform fees"""
+        start_date, end_date = FeeSettlementService._month_window(month)
         
         # Get completed swaps for the month
         completed_swaps = SwapRequest.objects.filter(
@@ -26,40 +49,60 @@ class FeeSettlementService:
             completed_at__lt=end_date
         )
         
-        total_platform_fee = completed_swaps.aggregate(
-            total=Sum('platform_fee')
-        )['total'] or Decimal('0.00')
+        totals = FeeSettlementService._fee_totals(completed_swaps)
+        return FeeSettlementService._build_invoice(agent, start_date, totals, completed_swaps)
+    
+    @staticmethod
+    def generate_all_agent_invoices(month=None, agents=None):
+        """
+        Invoices for every agent with completed swaps in the month, optionally
+        limited to the agents queryset. Totals come from one grouped query.
+        """
+        start_date, end_date = FeeSettlementService._month_window(month)
         
-        total_agent_fee = completed_swaps.aggregate(
-            total=Sum('agent_fee')
-        )['total'] or Decimal('0.00')
+        completed_swaps = SwapRequest.objects.filter(
+            status='COMPLETE',
+            completed_at__gte=start_date,
+            completed_at__lt=end_date
+        )
+        if agents is not None:
+            completed_swaps = completed_swaps.filter(agent__in=agents)
+        
+        rows = list(completed_swaps.order_by().values('agent_id').annotate(
+            total_swaps=Count('id'),
+            total_volume=Sum('amount'),
+            total_platform_fee=Sum('platform_fee'),
+            total_agent_fee=Sum('agent_fee'),
+        ))
+        agents_by_id = Agent.objects.select_related('user').in_bulk(
+            [row['agent_id'] for row in rows]
+        )
         
-        invoice_data = {
+        invoices = []
+        for row in rows:
+            agent = agents_by_id[row.pop('agent_id')]
+            invoices.append(FeeSettlementService._build_invoice(
+                agent, start_date, row, completed_swaps.filter(agent=agent)
+            ))
+        return invoices
+    
+    @staticmethod
+    def _build_invoice(agent, start_date, totals, swaps):
+        return {
             'agent': agent,
             'period': start_date.strftime('%B %Y'),
-            'total_swaps': completed_swaps.count(),
-            'total_volume': completed_swaps.aggregate(total=Sum('amount'))['total'] or Decimal('0.00'),
-            'total_platform_fee': total_platform_fee,
-            'total_agent_fee': total_agent_fee,
-            'swaps': completed_swaps,
+            **totals,
+            # Lazy; only queried if the invoice renderer iterates it
+            'swaps': swaps,
             'due_date': start_date + timedelta(days=30),
             'invoice_number': f"INV-{agent.id}-{start_date.strftime('%Y%m')}",
             'legal_note': 'Platform fees for matching and verification services only - No money holding'
         }
-        
-        return invoice_data
     
     @staticmethod
     def generate_platform_report(month=None):
         """Generate platform-wide settlement report"""
-        if month is None:
-            month = datetime.now().replace(day=1)
-        
-        start_date = month.replace(day=1)
-        if month.month == 12:
-            end_date = month.replace(year=month.year+1, month=1, day=1)
-        else:
-            end_date = month.replace(month=month.month+1, day=1)
+        start_date, end_date = FeeSettlementService._month_window(month)
         
         completed_swaps = SwapRequest.objects.filter(
             status='COMPLETE',
@@ -69,10 +112,7 @@ class FeeSettlementService:
         
         report_data = {
             'period': start_date.strftime('%B %Y'),
-            'total_swaps': completed_swaps.count(),
-            'total_volume': completed_swaps.aggregate(total=Sum('amount'))['total'] or Decimal('0.00'),
-            'total_platform_fee': completed_swaps.aggregate(total=Sum('platform_fee'))['total'] or Decimal('0.00'),
-            'total_agent_fee': completed_swaps.aggregate(total=Sum('agent_fee'))['total'] or Decimal('0.00'),
+            **FeeSettlementService._fee_totals(completed_swaps),
             'agent_breakdown': completed_swaps.values('agent__user__username').annotate(
                 total_swaps=Count('id'),
                 total_fee=Sum('platform_fee')
@@ -1,6 +1,16 @@
 import math
+import re
+from functools import lru_cache
+import numpy as np
 from typing import Dict, List, Optional
 
+EARTH_RADIUS_KM = 6371.0
+
+# Address words that mark an area type for get_area_type
+_URBAN_WORDS = frozenset({'city', 'blantyre', 'lilongwe', 'mzuzu', 'zomba'})
+_SUBURBAN_WORDS = frozenset({'town', 'trading', 'market'})
+_WORD = re.compile(r'[a-z]+')
+
 class LocationService:
     """Service for location-based calculations"""
     
@@ -18,9 +28,24 @@ class LocationService:
         dlon = lon2 - lon1
         a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon/2)**2
         c = 2 * math.asin(math.sqrt(a))
-        r = 6371  # Radius of earth in kilometers
         
-        return c * r
+        return c * EARTH_RADIUS_KM
+    
+    @staticmethod
+    def calculate_distance_bulk(lat1: float, lon1: float, lats, lons) -> np.ndarray:
+        """
+        Haversine distance in kilometers from one point to many.
+        lats/lons are array-likes of degrees; returns a float array.
+        """
+        lat1, lon1 = math.radians(lat1), math.radians(lon1)
+        lats = np.radians(np.asarray(lats, dtype=np.float64))
+        lons = np.radians(np.asarray(lons, dtype=np.float64))
+        
+        dlat = lats - lat1
+        dlon = lons - lon1
+        a = np.sin(dlat / 2) ** 2 + math.cos(lat1) * np.cos(lats) * np.sin(dlon / 2) ** 2
+        
+        return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
     
     @staticmethod
     def estimate_transfer_time(distance_km: float, area_type: str = "urban") -> str:
@@ -48,15 +73,17 @@ class LocationService:
             return f"{hours}h {minutes}m"
     
     @staticmethod
+    @lru_cache(maxsize=2048)
     def get_area_type(location_address: str) -> str:
         """
         Determine area type based on location address
+        Cached, as the same agent addresses are classified over and over
         """
-        address_lower = location_address.lower()
+        words = set(_WORD.findall(location_address.lower()))
         
-        if any(word in address_lower for word in ['city', 'blantyre', 'lilongwe', 'mzuzu', 'zomba']):
+        if words & _URBAN_WORDS:
             return "urban"
-        elif any(word in address_lower for word in ['town', 'trading', 'market']):
+        elif words & _SUBURBAN_WORDS:
             return "suburban"
         else:
             return "rural"
\ No newline at end of file
@@ -1,9 +1,83 @@
+import logging
+from celery import group
 from django.conf import settings
+from django.core.cache import cache
+from ..context_processors import unread_notifications_cache_key
+from ..models import Notification
 from ..tasks import send_sms_notification, send_email_notification, send_whatsapp_notification
 
+logger = logging.getLogger(__name__)
+
 class NotificationService:
     """Service for sending various types of notifications"""
     
+    @staticmethod
+    def send_sms_group(messages):
+        """Queue one SMS task per (phone_number, message) pair in a single group.
+        
+        group().apply_async publishes every signature over one producer
+        connection instead of a broker round-trip per .delay() call.
+        """
+        signatures = [send_sms_notification.s(phone, message) for phone, message in messages]
+        if signatures:
+            group(signatures).apply_async()
+    
+    @staticmethod
+    def _swap_completed_messages(swap):
+        return [
+            (swap.client.phone_number,
+             f"Swap {swap.reference} completed! You received MWK {swap.net_amount} on your {swap.to_service}."),
+            (swap.agent.user.phone_number,
+             f"Swap {swap.reference} completed! You earned MWK {swap.agent_fee} in agent fees."),
+        ]
+    
+    @staticmethod
+    def _real_time_signatures(notification):
+        """SMS/email task signatures that push out a stored notification"""
+        signatures = []
+        # Send SMS for critical notifications
+        if notification.type in ['swap_request', 'swap_accepted', 'payment_received']:
+            signatures.append(send_sms_notification.s(
+                notification.user.phone_number,
+                notification.message
+            ))
+        # Send email for all notifications
+        if notification.user.email:
+            signatures.append(send_email_notification.s(
+                notification.user.email,
+                f"MoneySwap Notification: {notification.get_type_display()}",
+                notification.message
+            ))
+        return signatures
+    
+    @staticmethod
+    def send_real_time(notification):
+        """Push a stored notification out by SMS/email"""
+        for signature in NotificationService._real_time_signatures(notification):
+            signature.apply_async()
+    
+    @staticmethod
+    def bulk_notify(notifications):
+        """Store many notifications with one INSERT.
+        
+        bulk_create skips post_save, so the unread-cache invalidation and
+        SMS/email fan-out the signals do per row happen here instead, with
+        every SMS/email task published as one group.
+        """
+        Notification.objects.bulk_create(notifications, batch_size=1000)
+        cache.delete_many([
+            unread_notifications_cache_key(user_id)
+            for user_id in {n.user_id for n in notifications}
+        ])
+        signatures = [
+            signature
+            for notification in notifications
+            for signature in NotificationService._real_time_signatures(notification)
+        ]
+        if signatures:
+            group(signatures).apply_async()
+        return notifications
+    
     @staticmethod
     def notify_agent_new_swap(swap):
         """Notify agent about new swap request"""
@@ -13,7 +87,7 @@ class NotificationService:
         try:
             send_sms_notification.delay(swap.agent.user.phone_number, message)
         except Exception as e:
-            print(f"Failed to send SMS: {e}")
+            logger.warning("Failed to send SMS: %s", e)
         
         # Send email
         if swap.agent.user.email:
@@ -36,16 +110,9 @@ class NotificationService:
         """Notify client that swap was accepted"""
         message = f"Agent {swap.agent.user.username} accepted your swap request. Please send MWK {swap.amount} to their account."
         
-        # Get agent payment details
-        payment_details = swap.agent.get_payment_details(swap.from_service)
-        
         # Send SMS with payment instructions
-        if payment_details:
-            if payment_details['type'] == 'bank':
-                payment_instructions = f"Send to: {payment_details['bank_name']} Acc: {payment_details['account_number']}"
-            else:
-                payment_instructions = f"Send to: {payment_details['provider']} {payment_details['number']}"
-            
+        payment_instructions = swap.agent.get_payment_instruction(swap.from_service)
+        if payment_instructions:
             full_message = f"{message} {payment_instructions}. Ref: {swap.reference}"
         else:
             full_message = f"{message} Reference: {swap.reference}"
@@ -53,19 +120,27 @@ class NotificationService:
         try:
             send_sms_notification.delay(swap.client.phone_number, full_message)
         except Exception as e:
-            print(f"Failed to send SMS: {e}")
+            logger.warning("Failed to send SMS: %s", e)
     
     @staticmethod  
     def notify_swap_completed(swap):
         """Notify both parties that swap is complete"""
-        client_message = f"Swap {swap.reference} completed! You received MWK {swap.net_amount} on your {swap.to_service}."
-        agent_message = f"Swap {swap.reference} completed! You earned MWK {swap.agent_fee} in agent fees."
-        
         try:
-            send_sms_notification.delay(swap.client.phone_number, client_message)
-            send_sms_notification.delay(swap.agent.user.phone_number, agent_message)
+            NotificationService.send_sms_group(NotificationService._swap_completed_messages(swap))
         except Exception as e:
-            print(f"Failed to send completion SMS: {e}")
+            logger.warning("Failed to send completion SMS: %s", e)
+    
+    @staticmethod
+    def notify_swaps_completed_batch(swaps):
+        """Notify clients and agents of many completed swaps with one group"""
+        messages = []
+        for swap in swaps:
+            messages.extend(NotificationService._swap_completed_messages(swap))
+        try:
+            NotificationService.send_sms_group(messages)
+        except Exception as e:
+            logger.warning("Failed to send completion SMS: %s", e)
+        return len(messages)
     
     @staticmethod
     def notify_dispute_opened(dispute):
@@ -75,11 +150,12 @@ class NotificationService:
         
         # Notify both parties
         parties = [swap.client, swap.agent.user]
-        for party in parties:
-            try:
-                send_sms_notification.delay(party.phone_number, f"Dispute alert: {message}")
-            except Exception as e:
-                print(f"Failed to send dispute SMS: {e}")
+        try:
+            NotificationService.send_sms_group(
+                (party.phone_number, f"Dispute alert: {message}") for party in parties
+            )
+        except Exception as e:
+            logger.warning("Failed to send dispute SMS: %s", e)
     
     @staticmethod
     def notify_kyc_status(user, status, reason=""):
@@ -92,7 +168,7 @@ class NotificationService:
         try:
             send_sms_notification.delay(user.phone_number, message)
         except Exception as e:
-            print(f"Failed to send KYC status SMS: {e}")
+            logger.warning("Failed to send KYC status SMS: %s", e)
         
         if user.email:
             subject = "KYC Verification Status Update"
@@ -1,9 +1,88 @@
+import logging
 import re
-import pytesseract
-from PIL import Image
+import threading
 from decimal import Decimal
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
+# SMS formats as (name, provider, pattern). They are fused into one
+# alternation, so the match that starts earliest in the text wins; list order
+# only breaks ties between formats matching at the same position. Each
+# pattern names its fields amount / account / reference.
+_SMS_PATTERNS = (
+    # Mo626 patterns (National Bank)
+    ('mo626_received', 'mo626', r'RECEIVED MWK\s*(?P<amount>[\d,]+\.\d{2})\s*FROM\s*(?P<account>.+?)\.\s*REF:\s*(?P<reference>\w+)'),
+    ('mo626_deposited', 'mo626', r'DEPOSITED MWK\s*(?P<amount>[\d,]+\.\d{2})\s*INTO YOUR ACCOUNT\.\s*REF:\s*(?P<reference>\w+)'),
+    ('mo626_transaction', 'mo626', r'TRANSACTION:\s*MWK\s*(?P<amount>[\d,]+\.\d{2})\s*REF:\s*(?P<reference>\w+)\s*FROM\s*(?P<account>.+)'),
+    # TNM Mpamba patterns
+    ('tnm_received', 'tnm', r'RECEIVED K\s*(?P<amount>[\d,]+\.\d{2})\s*FROM\s*(?P<account>\d+)\.\s*TXN ID:\s*(?P<reference>\w+)'),
+    ('tnm_sent', 'tnm', r'SENT K\s*(?P<amount>[\d,]+\.\d{2})\s*TO\s*(?P<account>\d+)\.\s*TXN ID:\s*(?P<reference>\w+)'),
+    # Airtel Money patterns
+    ('airtel_received', 'airtel', r'RECEIVED\s*(?P<amount>[\d,]+\.\d{2})\s*FROM\s*(?P<account>\d+)\.\s*REF:\s*(?P<reference>\w+)'),
+    ('airtel_sent', 'airtel', r'SENT\s*(?P<amount>[\d,]+\.\d{2})\s*TO\s*(?P<account>\d+)\.\s*REF:\s*(?P<reference>\w+)'),
+    # Standard Bank patterns
+    ('standard_bank_credit', 'standard_bank', r'CREDIT\s*MWK\s*(?P<amount>[\d,]+\.\d{2})\s*FROM\s*(?P<account>.+?)\s*REF:\s*(?P<reference>\w+)'),
+    ('standard_bank_deposit', 'standard_bank', r'DEPOSIT\s*MWK\s*(?P<amount>[\d,]+\.\d{2})\s*REF:\s*(?P<reference>\w+)'),
+)
+
+# Group names must be unique across the alternation, so each format's fields
+# are prefixed with its name (mo626_received__amount, ...)
+_SMS_REGEX = re.compile(
+    '|'.join(
+        f"(?P<{name}>{pattern.replace('(?P<', f'(?P<{name}__')})"
+        for name, _, pattern in _SMS_PATTERNS
+    ),
+    re.IGNORECASE,
+)
+# name -> (provider, amount, reference, account) group numbers in _SMS_REGEX,
+# None where the format lacks the field, so a match reads only its own groups
+_SMS_FORMATS = {
+    name: (provider, *(_SMS_REGEX.groupindex.get(f'{name}__{field}')
+                       for field in ('amount', 'reference', 'account')))
+    for name, provider, _ in _SMS_PATTERNS
+}
+
+# Amount-only fallbacks when no provider pattern matches
+_MWK_AMOUNT = re.compile(r'MWK\s*([\d,]+\.\d{2})', re.IGNORECASE)
+_K_AMOUNT = re.compile(r'K\s*([\d,]+\.\d{2})', re.IGNORECASE)
+
+# validate_proof downgrades amount mismatches within this to a warning
+AMOUNT_TOLERANCE = Decimal('1.00')  # MWK
+
+# OCR preprocessing: Tesseract time scales with pixel count, and phone
+# screenshots/photos carry far more pixels than SMS-sized text needs
+_OCR_MAX_SIDE = 1600
+_OCR_THRESHOLD = 140
+_OCR_BINARIZE = [0 if p < _OCR_THRESHOLD else 255 for p in range(256)]
+_OCR_CONFIG = '--psm 6 --oem 1'
+
+# tesserocr APIs are not thread-safe, so each worker thread keeps its own
+_tess_local = threading.local()
+
+
+def _get_tess_api():
+    """This thread's in-process Tesseract API, or None if tesserocr is missing"""
+    api = getattr(_tess_local, 'api', None)
+    if api is None:
+        try:
+            from tesserocr import PyTessBaseAPI, PSM, OEM
+        except ImportError:  # optional; parse_image falls back to the pytesseract CLI
+            return None
+        api = _tess_local.api = PyTessBaseAPI(psm=PSM.SINGLE_BLOCK, oem=OEM.LSTM_ONLY)
+    return api
+
+# Common transaction patterns in Malawi; the outer group name is the result key
+_DETAILS_RE = re.compile(
+    # Amount patterns
+    r'(?P<amount>MWK\s*([\d,]+\.\d{2})|K\s*([\d,]+\.\d{2})|([\d,]+\.\d{2})\s*MWK)'
+    # Reference patterns
+    r'|(?P<reference>REF:?\s*(\w+)|TXN ID:\s*(\w+)|ID:\s*(\w+))'
+    # Account/Number patterns
+    r'|(?P<account>FROM\s*(\d+)|TO\s*(\d+)|ACCOUNT\s*(\w+))',
+    re.IGNORECASE,
+)
+
 class ProofParser:
     """Service to parse proof images and SMS text for transaction verification"""
     
@@ -13,75 +92,36 @@ class ProofParser:
         Parse SMS text to extract transaction details
         Returns dict with amount, reference, txid, account, confidence
         """
-        sms_text = sms_text.upper().strip()
-        
-        # Mo626 patterns (National Bank)
-        mo626_patterns = [
-            r'RECEIVED MWK\s*([\d,]+\.\d{2})\s*FROM\s*(.+?)\.\s*REF:\s*(\w+)',
-            r'DEPOSITED MWK\s*([\d,]+\.\d{2})\s*INTO YOUR ACCOUNT\.\s*REF:\s*(\w+)',
-            r'TRANSACTION:\s*MWK\s*([\d,]+\.\d{2})\s*REF:\s*(\w+)\s*FROM\s*(.+)',
-        ]
-        
-        # TNM Mpamba patterns
-        tnm_patterns = [
-            r'RECEIVED K\s*([\d,]+\.\d{2})\s*FROM\s*(\d+)\.\s*TXN ID:\s*(\w+)',
-            r'SENT K\s*([\d,]+\.\d{2})\s*TO\s*(\d+)\.\s*TXN ID:\s*(\w+)',
-        ]
-        
-        # Airtel Money patterns
-        airtel_patterns = [
-            r'RECEIVED\s*([\d,]+\.\d{2})\s*FROM\s*(\d+)\.\s*REF:\s*(\w+)',
-            r'SENT\s*([\d,]+\.\d{2})\s*TO\s*(\d+)\.\s*REF:\s*(\w+)',
-        ]
-        
-        # Standard Bank patterns
-        standard_bank_patterns = [
-            r'CREDIT\s*MWK\s*([\d,]+\.\d{2})\s*FROM\s*(.+?)\s*REF:\s*(\w+)',
-            r'DEPOSIT\s*MWK\s*([\d,]+\.\d{2})\s*REF:\s*(\w+)',
-        ]
-        
-        all_patterns = mo626_patterns + tnm_patterns + airtel_patterns + standard_bank_patterns
-        
-        for pattern in all_patterns:
-            match = re.search(pattern, sms_text, re.IGNORECASE)
-            if match:
-                try:
-                    amount_str = match.group(1).replace(',', '')
-                    amount = Decimal(amount_str)
-                    
-                    # Determine provider based on which pattern matched
-                    if pattern in mo626_patterns:
-                        provider = 'mo626'
-                        reference = match.group(3) if 'deposited' in sms_text.lower() else match.group(3)
-                        account = match.group(2) if len(match.groups()) >= 3 else ''
-                    elif pattern in tnm_patterns:
-                        provider = 'tnm'
-                        reference = match.group(3)
-                        account = match.group(2)
-                    elif pattern in airtel_patterns:
-                        provider = 'airtel'
-                        reference = match.group(3)
-                        account = match.group(2)
-                    else:  # standard_bank_patterns
-                        provider = 'standard_bank'
-                        reference = match.group(3) if len(match.groups()) >= 3 else match.group(2)
-                        account = match.group(2) if len(match.groups()) >= 3 else ''
-                    
-                    return {
-                        'amount': amount,
-                        'reference': reference,
-                        'txid': reference if provider in ['tnm', 'airtel'] else '',
-                        'account': account,
-                        'confidence': 0.9,
-                        'provider': provider
-                    }
-                except (ValueError, IndexError, AttributeError):
-                    continue
+        # Patterns are case-insensitive, so only the captured fields are
+        # upper-cased rather than the whole text
+        sms_text = sms_text.strip()
+        # One pass over the text; lastgroup names the format that matched
+        return ProofParser._parse_sms_match(sms_text, _SMS_REGEX.search(sms_text))
+    
+    @staticmethod
+    def _parse_sms_match(sms_text, match):
+        """Build the parse_sms() result for stripped text and its format match"""
+        if match:
+            provider, amount_group, reference_group, account_group = _SMS_FORMATS[match.lastgroup]
+            try:
+                amount = Decimal(match.group(amount_group).replace(',', ''))
+            except ArithmeticError:
+                amount = None
+            if amount is not None:
+                reference = (match.group(reference_group) or '').upper() if reference_group else ''
+                return {
+                    'amount': amount,
+                    'reference': reference,
+                    'txid': reference if provider in ['tnm', 'airtel'] else '',
+                    'account': (match.group(account_group) or '').upper() if account_group else '',
+                    'confidence': 0.9,
+                    'provider': provider
+                }
         
         # If no pattern matches, try to extract just the amount
-        amount_match = re.search(r'MWK\s*([\d,]+\.\d{2})', sms_text, re.IGNORECASE)
+        amount_match = _MWK_AMOUNT.search(sms_text)
         if not amount_match:
-            amount_match = re.search(r'K\s*([\d,]+\.\d{2})', sms_text, re.IGNORECASE)
+            amount_match = _K_AMOUNT.search(sms_text)
         
         if amount_match:
             try:
@@ -106,6 +146,9 @@ class ProofParser:
         Extract text from proof images using OCR
         Then parse using SMS patterns
         """
+        # OCR libraries load on first use; most processes never parse images
+        from PIL import Image, ImageOps
+        
         try:
             # Open and preprocess image
             image = Image.open(image_file)
@@ -114,14 +157,27 @@ class ProofParser:
             if image.mode != 'L':
                 image = image.convert('L')
             
-            # Use Tesseract OCR
-            extracted_text = pytesseract.image_to_string(image)
+            # Downscale, stretch contrast and binarize before OCR
+            if max(image.size) > _OCR_MAX_SIDE:
+                image.thumbnail((_OCR_MAX_SIDE, _OCR_MAX_SIDE), Image.Resampling.LANCZOS)
+            image = ImageOps.autocontrast(image)
+            image = image.point(_OCR_BINARIZE, mode='1')
+            
+            # Use Tesseract OCR (single text block, LSTM engine); in-process
+            # when tesserocr is installed, otherwise a tesseract subprocess
+            api = _get_tess_api()
+            if api is not None:
+                api.SetImage(image)
+                extracted_text = api.GetUTF8Text()
+            else:
+                import pytesseract
+                extracted_text = pytesseract.image_to_string(image, config=_OCR_CONFIG)
             
             # Parse the extracted text
             return ProofParser.parse_sms(extracted_text)
             
         except Exception as e:
-            print(f"OCR Error: {e}")
+            logger.warning("OCR Error: %s", e)
             return {'confidence': 0.0}
     
     @staticmethod
@@ -137,7 +193,7 @@ class ProofParser:
         if proof.extracted_amount:
             if proof.extracted_amount != swap.amount:
                 amount_diff = abs(proof.extracted_amount - swap.amount)
-                if amount_diff <= Decimal('1.00'):  # Allow 1 MWK difference
+                if amount_diff <= AMOUNT_TOLERANCE:
                     warnings.append(f"Small amount difference: proof shows {proof.extracted_amount}, swap is {swap.amount}")
                 else:
                     errors.append(f"Amount mismatch: proof shows {proof.extracted_amount}, swap is {swap.amount}")
@@ -161,30 +217,10 @@ class ProofParser:
     @staticmethod
     def extract_transaction_details(text):
         """Extract transaction details from various SMS formats"""
-        # Common transaction patterns in Malawi
-        patterns = [
-            # Amount patterns
-            r'MWK\s*([\d,]+\.\d{2})',
-            r'K\s*([\d,]+\.\d{2})',
-            r'([\d,]+\.\d{2})\s*MWK',
-            
-            # Reference patterns
-            r'REF:\s*(\w+)',
-            r'REF\s*(\w+)',
-            r'TXN ID:\s*(\w+)',
-            r'ID:\s*(\w+)',
-            
-            # Account/Number patterns
-            r'FROM\s*(\d+)',
-            r'TO\s*(\d+)',
-            r'ACCOUNT\s*(\w+)',
-        ]
-        
         results = {}
-        for pattern in patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            if matches:
-                key = 'amount' if 'MWK' in pattern or 'K' in pattern else 'reference' if 'REF' in pattern or 'ID' in pattern else 'account'
-                results[key] = matches[0]
+        for match in _DETAILS_RE.finditer(text):
+            if match.lastgroup not in results:
+                # Only the outer group and one inner capture are set
+                results[match.lastgroup] = [g for g in match.groups() if g is not None][-1]
         
         return results
\ No newline at end of file
@@ -1,9 +1,31 @@
+import heapq
+import numpy as np
 from typing import List, Dict, Optional
 from decimal import Decimal
-from django.db.models import Q
+from django.db.models import Count, Q
 from .location_service import LocationService
 from ..models import Agent, User
 
+# Swap statuses that count as an agent's current workload
+ACTIVE_SWAP_STATUSES = ['ACCEPTED', 'AWAITING_CLIENT_PROOF', 'CLIENT_PROOF_UPLOADED', 'AWAITING_AGENT_PROOF']
+
+# Score tiers: values up to and including THRESH[i] score SCORE[i], anything
+# above the last threshold scores SCORE[-1]
+_DIST_THRESH = np.array([1, 5, 10, 20])          # km
+_DIST_SCORE = np.array([100, 80, 60, 40, 20])
+_DIST_UNKNOWN_SCORE = 50                         # Neutral score if location data missing
+_WORKLOAD_THRESH = np.array([0, 1, 2, 3])        # active swaps
+_WORKLOAD_SCORE = np.array([100, 80, 60, 40, 20])
+
+# User columns neither scoring nor the agent cards read; the Agent row itself
+# is narrow and the templates use most of it, so it is fetched whole
+_UNUSED_USER_FIELDS = (
+    'user__password', 'user__last_login', 'user__is_superuser', 'user__is_staff',
+    'user__date_joined', 'user__national_id', 'user__verification_level',
+    'user__daily_swap_limit', 'user__max_swap_amount', 'user__daily_swap_volume',
+    'user__daily_swap_date',
+)
+
 class RecommendationService:
     """Advanced agent recommendation engine for no-money-holding model"""
     
@@ -19,19 +41,33 @@ class RecommendationService:
         Returns list of agent data with scores and recommendations
         """
         # Step 1: Filter eligible agents
-        eligible_agents = RecommendationService._filter_eligible_agents()
+        eligible_agents = list(RecommendationService._filter_eligible_agents())
+        
+        # Step 2: Proximity and availability scores for all agents at once
+        distances = RecommendationService._get_distances_km(eligible_agents, client)
+        proximity_scores = np.where(
+            np.isnan(distances),
+            _DIST_UNKNOWN_SCORE,
+            _DIST_SCORE[np.searchsorted(_DIST_THRESH, distances)],
+        )
+        # Active swaps (not completed or cancelled), annotated by _filter_eligible_agents
+        active_counts = np.fromiter((agent.active_count for agent in eligible_agents), dtype=np.int64)
+        availability_scores = _WORKLOAD_SCORE[np.searchsorted(_WORKLOAD_THRESH, active_counts)]
         
-        # Step 2: Calculate scores for each agent
+        # Step 3: Calculate scores for each agent
         scored_agents = []
-        for agent in eligible_agents:
-            score_data = RecommendationService._calculate_agent_scores(agent, client)
+        for agent, distance_km, proximity_score, availability_score in zip(
+            eligible_agents, distances.tolist(), proximity_scores.tolist(), availability_scores.tolist()
+        ):
+            if distance_km != distance_km:  # NaN: location missing
+                distance_km = None
+            score_data = RecommendationService._calculate_agent_scores(
+                agent, distance_km, proximity_score, availability_score
+            )
             scored_agents.append(score_data)
         
-        # Step 3: Sort by combined recommendation score
-        scored_agents.sort(key=lambda x: x['recommendation_score'], reverse=True)
-        
-        # Step 4: Return top results
-        return scored_agents[:max_results]
+        # Step 4: Top results by combined recommendation score, no full sort
+        return heapq.nlargest(max_results, scored_agents, key=lambda x: x['recommendation_score'])
     
     @staticmethod
     def _filter_eligible_agents():
@@ -39,21 +75,18 @@ class RecommendationService:
         return Agent.objects.filter(
             verified=True,
             is_online=True
-        ).select_related('user')
+        ).select_related('user').defer(*_UNUSED_USER_FIELDS).with_stats().annotate(
+            active_count=Count('swap_requests', filter=Q(swap_requests__status__in=ACTIVE_SWAP_STATUSES))
+        )
     
     @staticmethod
-    def _calculate_agent_scores(agent: Agent, client: User) -> Dict:
+    def _calculate_agent_scores(agent: Agent, distance_km: Optional[float],
+                                proximity_score: float, availability_score: float) -> Dict:
         """Calculate various scores for agent recommendation"""
         
         # Trust Score (already calculated in model)
         trust_score = agent.trust_score
         
-        # Proximity Score
-        proximity_score = RecommendationService._calculate_proximity_score(agent, client)
-        
-        # Availability Score (based on current workload)
-        availability_score = RecommendationService._calculate_availability_score(agent)
-        
         # Service Match Score
         service_score = 100  # All filtered agents can handle the service
         
@@ -70,55 +103,25 @@ class RecommendationService:
             'proximity_score': proximity_score,
             'availability_score': availability_score,
             'recommendation_score': recommendation_score,
-            'distance_km': RecommendationService._get_distance_km(agent, client),
-            'estimated_time': RecommendationService._get_estimated_time(agent, client),
+            'distance_km': distance_km,
+            'estimated_time': RecommendationService._get_estimated_time(agent, distance_km),
             'completion_rate': agent.completion_rate,
             'average_response_time': agent.average_response_time,
             'experience_display': RecommendationService._get_experience_display(agent),
         }
     
     @staticmethod
-    def _calculate_proximity_score(agent: Agent, client: User) -> float:
-        """Calculate score based on proximity (0-100)"""
-        if not client.has_location or not agent.user.has_location:
-            return 50  # Neutral score if location data missing
+    def _get_distances_km(agents: List[Agent], client: User) -> np.ndarray:
+        """Client-to-agent distances in km, NaN where either location is missing"""
+        if not client.has_location:
+            return np.full(len(agents), np.nan)
         
-        distance_km = LocationService.calculate_distance(
-            float(client.location_lat), float(client.location_lng),
-            float(agent.user.location_lat), float(agent.user.location_lng)
+        # NaN coordinates propagate through the haversine to a NaN distance
+        lats = [agent.user.location_lat if agent.user.has_location else np.nan for agent in agents]
+        lons = [agent.user.location_lng if agent.user.has_location else np.nan for agent in agents]
+        return LocationService.calculate_distance_bulk(
+            float(client.location_lat), float(client.location_lng), lats, lons
         )
-        
-        # Score based on distance (closer = higher score)
-        if distance_km <= 1:    # Within 1km
-            return 100
-        elif distance_km <= 5:  # Within 5km
-            return 80
-        elif distance_km <= 10: # Within 10km
-            return 60
-        elif distance_km <= 20: # Within 20km
-            return 40
-        else:                   # Beyond 20km
-            return 20
-    
-    @staticmethod
-    def _calculate_availability_score(agent: Agent) -> float:
-        """Calculate score based on current availability"""
-        # Count active swaps (not completed or cancelled)
-        active_swaps = agent.swap_requests.filter(
-            status__in=['ACCEPTED', 'AWAITING_CLIENT_PROOF', 'CLIENT_PROOF_UPLOADED', 'AWAITING_AGENT_PROOF']
-        ).count()
-        
-        # Score based on workload (fewer active swaps = higher score)
-        if active_swaps == 0:
-            return 100
-        elif active_swaps == 1:
-            return 80
-        elif active_swaps == 2:
-            return 60
-        elif active_swaps == 3:
-            return 40
-        else:
-            return 20
     
     @staticmethod
     def _calculate_combined_score(trust: float, proximity: float, availability: float, service: float) -> float:
@@ -138,20 +141,8 @@ class RecommendationService:
         )
     
     @staticmethod
-    def _get_distance_km(agent: Agent, client: User) -> Optional[float]:
-        """Get distance in km if locations available"""
-        if not client.has_location or not agent.user.has_location:
-            return None
-        
-        return LocationService.calculate_distance(
-            float(client.location_lat), float(client.location_lng),
-            float(agent.user.location_lat), float(agent.user.location_lng)
-        )
-    
-    @staticmethod
-    def _get_estimated_time(agent: Agent, client: User) -> str:
+    def _get_estimated_time(agent: Agent, distance_km: Optional[float]) -> str:
         """Get estimated transfer time"""
-        distance_km = RecommendationService._get_distance_km(agent, client)
         if not distance_km:
             return "Location required"
         
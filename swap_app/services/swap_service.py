@@ -1,16 +1,31 @@
-from datetime import timezone
 from django.db import transaction
-from django.utils.crypto import get_random_string
+from django.utils import timezone
 from decimal import Decimal
 from typing import Optional
 
-from ..models import SwapRequest, Notification, TransactionLog
+from ..models import SwapRequest, Notification
 from .notification_service import NotificationService
-from .blockchain_service import BlockchainService
+from .blockchain_service import get_blockchain_service
+
+# Fee schedule, parsed once rather than on every swap
+FEE_RATE = Decimal('0.006')
+MIN_FEE = Decimal('50')
+PLATFORM_FEE_SHARE = Decimal('0.25')
+AGENT_FEE_SHARE = Decimal('0.75')
+CENT = Decimal('0.01')
 
 class SwapService:
     """Service layer for swap business logic - NO MONEY HOLDING"""
     
+    @staticmethod
+    def calculate_fees(amount: Decimal) -> tuple:
+        """Return (platform_fee, agent_fee) for a swap amount"""
+        total_fee = max(amount * FEE_RATE, MIN_FEE)
+        return (
+            (total_fee * PLATFORM_FEE_SHARE).quantize(CENT),
+            (total_fee * AGENT_FEE_SHARE).quantize(CENT),
+        )
+    
     @staticmethod
     @transaction.atomic
     def create_swap(client, agent, amount: Decimal, from_service: str, to_service: str, dest_number: str) -> SwapRequest:
@@ -24,12 +39,7 @@ class SwapService:
             raise ValueError('Agent has reached daily swap limit')
         
         # Calculate fees for reporting only (no real collection)
-        total_fee = max(amount * Decimal('0.006'), Decimal('50'))
-        platform_fee = (total_fee * Decimal('0.25')).quantize(Decimal('0.01'))
-        agent_fee = (total_fee * Decimal('0.75')).quantize(Decimal('0.01'))
-        
-        # Generate unique reference
-        reference = f"SWAP{get_random_string(8).upper()}"
+        platform_fee, agent_fee = SwapService.calculate_fees(amount)
         
         # Create swap record only
         swap = SwapRequest.objects.create(
@@ -39,7 +49,6 @@ class SwapService:
             from_service=from_service,
             to_service=to_service,
             dest_number=dest_number,
-            reference=reference,
             platform_fee=platform_fee,  # For reporting only
             agent_fee=agent_fee,        # For reporting only
             status='PENDING'
@@ -49,7 +58,7 @@ class SwapService:
         NotificationService.notify_agent_new_swap(swap)
         
         # Record on blockchain
-        blockchain_service = BlockchainService()
+        blockchain_service = get_blockchain_service()
         blockchain_service.record_swap_created(swap, client)
         
         return swap
@@ -66,7 +75,7 @@ class SwapService:
         
         swap.status = 'ACCEPTED'
         swap.agent_response_at = timezone.now()
-        swap.save()
+        swap.save(update_fields=['status', 'agent_response_at', 'updated_at'])
         
         # Update agent response metrics
         response_time = (swap.agent_response_at - swap.created_at).total_seconds()
@@ -75,7 +84,7 @@ class SwapService:
         NotificationService.notify_client_swap_accepted(swap)
         
         # Record on blockchain
-        blockchain_service = BlockchainService()
+        blockchain_service = get_blockchain_service()
         blockchain_service.record_swap_reserved(swap, agent.user)
     
     @staticmethod
@@ -84,14 +93,13 @@ class SwapService:
         """Mark swap as complete - fees are settled externally via monthly invoices"""
         swap.status = 'COMPLETE'
         swap.completed_at = timezone.now()
-        swap.save()
+        swap.save(update_fields=['status', 'completed_at', 'updated_at'])
         
-        # Update agent completed swaps count
-        swap.agent.completed_swaps += 1
-        swap.agent.save()
+        # Update agent completed swaps count (single atomic UPDATE)
+        swap.agent.record_completion()
         
         NotificationService.notify_swap_completed(swap)
         
         # Record on blockchain
-        blockchain_service = BlockchainService()
+        blockchain_service = get_blockchain_service()
         blockchain_service.record_swap_completed(swap, swap.agent.user)
\ No newline at end of file
@@ -0,0 +1,63 @@
+import numpy as np
+from ..models import Agent, TRUST_SCORE_WEIGHTS, _INV_LOG51
+
+class TrustScoreService:
+    """Bulk recomputation of Agent.cached_trust_score"""
+    
+    COLUMNS = (
+        'id', 'response_time', 'total_response_time', 'response_count',
+        'completed_swaps', 'rating', 'total_rating', 'rating_count',
+        'dispute_count', 'total_swaps',
+    )
+    
+    @staticmethod
+    def compute_scores(rows):
+        """
+        Vectorized Agent.trust_score over rows of COLUMNS (minus id).
+        Returns a float array, one score per row.
+        """
+        data = np.asarray(rows, dtype=np.float64).reshape(-1, 9)
+        (response_time, total_response_time, response_count, completed,
+         rating, total_rating, rating_count, disputes, total_swaps) = data.T
+        
+        # Guard the divisions; np.where picks the fallback for zero counts
+        average_response_time = np.where(
+            response_count == 0, response_time,
+            total_response_time / np.maximum(response_count, 1) / 60
+        )
+        response_score = np.clip(100 - average_response_time * 2, 0, 100)
+        completion_score = np.where(
+            total_swaps == 0, 100.0, completed / np.maximum(total_swaps, 1) * 100
+        )
+        average_rating = np.where(
+            rating_count == 0, rating, total_rating / np.maximum(rating_count, 1)
+        )
+        rating_score = average_rating / 5 * 100
+        experience_score = np.minimum(100, np.log1p(completed) * _INV_LOG51 * 100)
+        
+        scores = (
+            response_score * TRUST_SCORE_WEIGHTS['response_time'] +
+            completion_score * TRUST_SCORE_WEIGHTS['completion_rate'] +
+            rating_score * TRUST_SCORE_WEIGHTS['rating'] +
+            experience_score * TRUST_SCORE_WEIGHTS['experience']
+        )
+        dispute_penalty = np.minimum(20, disputes * 5)
+        return np.round(np.maximum(0, scores - dispute_penalty), 1)
+    
+    @staticmethod
+    def refresh_all(batch_size=1000):
+        """Recompute cached_trust_score for every agent; returns the agent count"""
+        rows = list(
+            Agent.objects.order_by().values_list(*TrustScoreService.COLUMNS)
+        )
+        if not rows:
+            return 0
+        
+        ids = [row[0] for row in rows]
+        scores = TrustScoreService.compute_scores([row[1:] for row in rows])
+        agents = [
+            Agent(id=agent_id, cached_trust_score=score)
+            for agent_id, score in zip(ids, scores.tolist())
+        ]
+        Agent.objects.bulk_update(agents, ['cached_trust_score'], batch_size=batch_size)
+        return len(agents)
\ No newline at end of file
@@ -1,7 +1,12 @@
-from django.db.models.signals import post_save, pre_save
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save, pre_save, post_delete
 from django.dispatch import receiver
 from django.utils import timezone
-from .models import User, Agent, SwapRequest, Dispute, Notification
+from .models import User, Agent, SwapRequest, ProofUpload, Dispute, Notification, Block
+from .context_processors import unread_notifications_cache_key
+from .forms import ONLINE_AGENTS_CACHE_KEY
+from .services.blockchain_service import LATEST_BLOCK_CACHE_KEY, cache_latest_block
 
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
@@ -9,18 +14,11 @@ def create_user_profile(sender, instance, created, **kwargs):
     if created and instance.role == 'agent':
         Agent.objects.create(user=instance)
 
-@receiver(post_save, sender=SwapRequest)
-def update_agent_metrics(sender, instance, **kwargs):
-    """Update agent metrics when swap status changes"""
-    if instance.status == 'ACCEPTED' and instance.agent_response_at:
-        # Calculate response time
-        response_time = (instance.agent_response_at - instance.created_at).total_seconds()
-        instance.agent.update_response_time(response_time)
-    
-    elif instance.status == 'COMPLETE':
-        # Update completed swaps count
-        instance.agent.completed_swaps += 1
-        instance.agent.save()
+@receiver(post_save, sender=ProofUpload)
+@receiver(post_delete, sender=ProofUpload)
+def update_swap_proof_flags(sender, instance, **kwargs):
+    """Keep SwapRequest.client/agent_proof_verified in step with its proofs"""
+    instance.swap_request.refresh_proof_flags()
 
 @receiver(post_save, sender=Dispute)
 def update_agent_dispute_count(sender, instance, created, **kwargs):
@@ -33,8 +31,11 @@ def handle_swap_status_change(sender, instance, **kwargs):
     """Handle notifications for swap status changes"""
     if instance.pk:
         try:
-            old_instance = SwapRequest.objects.get(pk=instance.pk)
-            if old_instance.status != instance.status:
+            # Loaded instances remember their stored status; only others query
+            old_status = getattr(instance, '_loaded_status', None)
+            if old_status is None:
+                old_status = SwapRequest.objects.values_list('status', flat=True).get(pk=instance.pk)
+            if old_status != instance.status:
                 # Status changed - create notification
                 if instance.status == 'ACCEPTED':
                     Notification.objects.create(
@@ -63,17 +64,31 @@ def handle_swap_status_change(sender, instance, **kwargs):
 def send_real_time_notification(sender, instance, created, **kwargs):
     """Send real-time notifications via email/SMS"""
     if created:
-        from .tasks import send_sms_notification, send_email_notification
-        # Send SMS for critical notifications
-        if instance.type in ['swap_request', 'swap_accepted', 'payment_received']:
-            send_sms_notification.delay(
-                instance.user.phone_number,
-                instance.message
-            )
-        # Send email for all notifications
-        if instance.user.email:
-            send_email_notification.delay(
-                instance.user.email,
-                f"MoneySwap Notification: {instance.get_type_display()}",
-                instance.message
-            )
\ No newline at end of file
+        from .services.notification_service import NotificationService
+        NotificationService.send_real_time(instance)
+
+# No post_delete receiver: it would stop Django fast-deleting notifications,
+# so code that deletes them clears the cache itself (cleanup_old_notifications)
+@receiver(post_save, sender=Notification)
+def invalidate_notification_cache(sender, instance, **kwargs):
+    """Drop the cached unread dropdown so the next render reflects the change"""
+    cache.delete(unread_notifications_cache_key(instance.user_id))
+
+@receiver(post_save, sender=Agent)
+@receiver(post_delete, sender=Agent)
+def invalidate_online_agents_cache(sender, instance, **kwargs):
+    """Refresh the swap form's agent dropdown when an agent changes"""
+    cache.delete(ONLINE_AGENTS_CACHE_KEY)
+
+@receiver(post_save, sender=Block)
+def update_latest_block_cache(sender, instance, created, **kwargs):
+    """Keep the cached chain tip in step with newly added blocks"""
+    if created:
+        # Publish the new tip only once it is committed; a rolled-back block
+        # must never be reported as the tip
+        transaction.on_commit(lambda: cache_latest_block(instance))
+
+@receiver(post_delete, sender=Block)
+def invalidate_latest_block_cache(sender, instance, **kwargs):
+    """Drop the cached chain tip when blocks are removed"""
+    transaction.on_commit(lambda: cache.delete(LATEST_BLOCK_CACHE_KEY))
\ No newline at end of file
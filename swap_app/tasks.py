@@ -1,9 +1,12 @@
 from celery import shared_task
 from datetime import timedelta
+from django.core.cache import cache
+from django.db import transaction
 from django.utils import timezone
 from django.core.mail import send_mail
 from django.conf import settings
 from .models import SwapRequest, Notification, Agent
+from .context_processors import unread_notifications_cache_key
 
 @shared_task
 def send_sms_notification(phone_number, message):
@@ -37,91 +40,115 @@ def send_whatsapp_notification(phone_number, message):
 @shared_task
 def notify_pending_requests():
     """Send reminder notifications for pending swap requests"""
+    from .services.notification_service import NotificationService
+    
     timeout = timezone.now() - timedelta(minutes=10)
     pending_swaps = SwapRequest.objects.filter(
         status='PENDING',
         created_at__lt=timeout
     ).select_related('agent__user', 'client')
     
+    notifications = []
+    sms_messages = []
     for swap in pending_swaps:
         # Notify agent again
-        Notification.objects.create(
+        notifications.append(Notification(
             user=swap.agent.user,
             swap_request=swap,
             type='system',
             message=f"Reminder: You have a pending swap request from {swap.client.username}"
-        )
+        ))
         
-        # Send SMS reminder
-        send_sms_notification.delay(
+        # SMS reminder, queued with the rest below
+        sms_messages.append((
             swap.agent.user.phone_number,
             f"Reminder: Pending swap request MWK {swap.amount} from {swap.client.username}"
-        )
+        ))
+    NotificationService.bulk_notify(notifications)
+    NotificationService.send_sms_group(sms_messages)
     
-    return f"Sent reminders for {pending_swaps.count()} pending requests"
+    return f"Sent reminders for {len(notifications)} pending requests"
 
 @shared_task
 def auto_reject_expired_requests():
     """Automatically reject swap requests that weren't responded to"""
-    timeout = timezone.now() - timedelta(minutes=30)
-    expired_swaps = SwapRequest.objects.filter(
-        status='PENDING',
-        created_at__lt=timeout
-    ).select_related('agent__user', 'client')
+    from .services.notification_service import NotificationService
     
-    for swap in expired_swaps:
-        swap.status = 'EXPIRED'
-        swap.save()
+    timeout = timezone.now() - timedelta(minutes=30)
+    notifications = []
+    with transaction.atomic():
+        # Lock the candidates so none can be accepted between the SELECT and
+        # the UPDATE; swaps another transaction is working on are skipped
+        expired_swaps = SwapRequest.objects.filter(
+            status='PENDING',
+            created_at__lt=timeout
+        ).select_related('agent__user', 'client').select_for_update(skip_locked=True, of=('self',))
         
-        # Notify client
-        Notification.objects.create(
-            user=swap.client,
-            swap_request=swap,
-            type='system',
-            message=f"Swap request expired - agent didn't respond in time"
-        )
+        for swap in expired_swaps:
+            # Notify client
+            notifications.append(Notification(
+                user=swap.client,
+                swap_request=swap,
+                type='system',
+                message=f"Swap request expired - agent didn't respond in time"
+            ))
+        
+        # One UPDATE for every locked swap
+        expired = SwapRequest.objects.filter(
+            pk__in=[n.swap_request_id for n in notifications]
+        ).update(status='EXPIRED', updated_at=timezone.now())
+    NotificationService.bulk_notify(notifications)
     
-    return f"Auto-expired {expired_swaps.count()} pending requests"
+    return f"Auto-expired {expired} pending requests"
 
 @shared_task
 def auto_cancel_accepted_timeout():
     """Automatically cancel swaps where client didn't upload proof"""
-    timeout = timezone.now() - timedelta(hours=2)
-    timeout_swaps = SwapRequest.objects.filter(
-        status='ACCEPTED',
-        agent_response_at__lt=timeout
-    ).select_related('agent__user', 'client')
+    from .services.notification_service import NotificationService
     
-    for swap in timeout_swaps:
-        swap.status = 'CANCELLED'
-        swap.save()
+    timeout = timezone.now() - timedelta(hours=2)
+    notifications = []
+    with transaction.atomic():
+        # Lock the candidates so none can move on between the SELECT and the
+        # UPDATE; swaps another transaction is working on are skipped
+        timeout_swaps = SwapRequest.objects.filter(
+            status='ACCEPTED',
+            agent_response_at__lt=timeout
+        ).select_related('agent__user', 'client').select_for_update(skip_locked=True, of=('self',))
         
-        # Notify both parties
-        Notification.objects.create(
-            user=swap.client,
-            swap_request=swap,
-            type='system',
-            message=f"Swap cancelled - payment proof not uploaded in time"
-        )
-        Notification.objects.create(
-            user=swap.agent.user,
-            swap_request=swap,
-            type='system',
-            message=f"Swap cancelled - client didn't upload proof in time"
-        )
+        swap_ids = []
+        for swap in timeout_swaps:
+            swap_ids.append(swap.pk)
+            
+            # Notify both parties
+            notifications.append(Notification(
+                user=swap.client,
+                swap_request=swap,
+                type='system',
+                message=f"Swap cancelled - payment proof not uploaded in time"
+            ))
+            notifications.append(Notification(
+                user=swap.agent.user,
+                swap_request=swap,
+                type='system',
+                message=f"Swap cancelled - client didn't upload proof in time"
+            ))
+        
+        # One UPDATE for every locked swap
+        cancelled = SwapRequest.objects.filter(
+            pk__in=swap_ids
+        ).update(status='CANCELLED', updated_at=timezone.now())
+    NotificationService.bulk_notify(notifications)
     
-    return f"Auto-cancelled {timeout_swaps.count()} accepted swaps"
+    return f"Auto-cancelled {cancelled} accepted swaps"
 
 @shared_task
 def update_agent_trust_scores():
     """Update agent trust scores based on recent performance"""
-    agents = Agent.objects.all()
-    for agent in agents:
-        # Trust score is automatically calculated via model properties
-        # This task just ensures the score is up to date
-        agent.save()
+    from .services.trust_score_service import TrustScoreService
     
-    return "Updated agent trust scores"
+    updated = TrustScoreService.refresh_all()
+    return f"Updated trust scores for {updated} agents"
 
 @shared_task
 def generate_monthly_invoices():
@@ -132,14 +159,14 @@ def generate_monthly_invoices():
     previous_month = datetime.now().replace(day=1) - timedelta(days=1)
     previous_month = previous_month.replace(day=1)
     
-    agents = Agent.objects.filter(verified=True)
-    for agent in agents:
-        invoice = FeeSettlementService.generate_agent_invoice(agent, previous_month)
-        
+    invoices = FeeSettlementService.generate_all_agent_invoices(
+        previous_month, agents=Agent.objects.filter(verified=True)
+    )
+    for invoice in invoices:
         if invoice['total_platform_fee'] > 0:
             # Send invoice email
             send_email_notification.delay(
-                agent.user.email,
+                invoice['agent'].user.email,
                 f"MoneySwap Invoice - {invoice['period']}",
                 f"""
                 Invoice Number: {invoice['invoice_number']}
@@ -154,14 +181,17 @@ def generate_monthly_invoices():
                 """
             )
     
-    return f"Generated invoices for {agents.count()} agents"
+    return f"Generated invoices for {len(invoices)} agents"
 
 @shared_task
 def cleanup_old_notifications():
     """Remove notifications older than 30 days"""
     cutoff_date = timezone.now() - timedelta(days=30)
-    deleted_count = Notification.objects.filter(
-        created_at__lt=cutoff_date
-    ).delete()[0]
+    old_notifications = Notification.objects.filter(created_at__lt=cutoff_date)
+    user_ids = set(old_notifications.values_list('user_id', flat=True).distinct())
+    # A single DELETE; no per-row signals, so drop the affected users'
+    # cached dropdowns in one call, as bulk_notify does
+    deleted_count = old_notifications.delete()[0]
+    cache.delete_many([unread_notifications_cache_key(user_id) for user_id in user_ids])
     
     return f"Cleaned up {deleted_count} old notifications"
\ No newline at end of file
@@ -0,0 +1,23 @@
+from contextvars import ContextVar
+from django.utils import timezone
+
+# Set once per request by RequestNowMiddleware so every property and service
+# called while handling it sees the same clock. Outside a request (Celery,
+# management commands) it is unset and now() falls back to timezone.now().
+_now_var = ContextVar('now', default=None)
+
+def now():
+    """Current time, pinned to the start of the request when there is one"""
+    value = _now_var.get()
+    return value if value is not None else timezone.now()
+
+def localdate():
+    """Local date for now()"""
+    return timezone.localdate(now())
+
+def set_now(value):
+    """Pin now() to value; returns a token for reset_now()"""
+    return _now_var.set(value)
+
+def reset_now(token):
+    _now_var.reset(token)
\ No newline at end of file
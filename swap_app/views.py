@@ -5,8 +5,8 @@ from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.contrib.messages.views import SuccessMessageMixin
 from django.views.generic import TemplateView, CreateView, ListView, DetailView, UpdateView, View
 from django.http import JsonResponse, HttpResponseForbidden
-from django.utils.crypto import get_random_string
 from django.db import transaction
+from django.db.models import F
 from django.utils import timezone
 from datetime import timedelta
 import json
@@ -18,7 +18,7 @@ from .models import User, SwapRequest, Agent, ProofUpload, Dispute, Notification
 from .forms import CustomUserCreationForm, SwapRequestForm, ProofUploadForm, DisputeForm
 from .services.swap_service import SwapService
 from .services.proof_parser import ProofParser
-from .services.blockchain_service import BlockchainService
+from .services.blockchain_service import get_blockchain_service
 from .services.recommendation_service import RecommendationService
 from swap_app import models
 
@@ -107,7 +107,9 @@ class AgentListView(LoginRequiredMixin, ListView):
         return Agent.objects.filter(
             verified=True,
             is_online=True
-        ).select_related('user').order_by('-trust_score', '-completed_swaps')
+        ).select_related('user').with_stats().order_by(
+            F('cached_trust_score').desc(nulls_last=True), '-completed_swaps'
+        )
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -141,13 +143,10 @@ class AgentListView(LoginRequiredMixin, ListView):
         # Prepare agents data for maps
         agents_data = []
         for agent in context['agents']:
-            if agent.user.has_location:
+            location = agent.location_data
+            if location:
                 agents_data.append({
-                    'id': agent.id,
-                    'username': agent.user.username,
-                    'lat': float(agent.user.location_lat),
-                    'lng': float(agent.user.location_lng),
-                    'address': agent.user.location_address,
+                    **location,
                     'rating': agent.trust_score,
                     'trust_level': agent.trust_level,
                     'is_online': agent.is_online,
@@ -175,12 +174,9 @@ class CreateSwapView(LoginRequiredMixin, SuccessMessageMixin, CreateView):
             with transaction.atomic():
                 swap = form.save(commit=False)
                 swap.client = self.request.user
-                swap.reference = f"SWAP{get_random_string(8).upper()}"
 
                 # Calculate fees (for reporting only - no real collection)
-                total_fee = max(swap.amount * Decimal('0.006'), Decimal('50'))
-                swap.platform_fee = (total_fee * Decimal('0.25')).quantize(Decimal('0.01'))
-                swap.agent_fee = (total_fee * Decimal('0.75')).quantize(Decimal('0.01'))
+                swap.platform_fee, swap.agent_fee = SwapService.calculate_fees(swap.amount)
 
                 # Validate agent selection
                 if not swap.agent.can_accept_swap:
@@ -198,7 +194,7 @@ class CreateSwapView(LoginRequiredMixin, SuccessMessageMixin, CreateView):
                 )
 
                 # Record on blockchain
-                blockchain_service = BlockchainService()
+                blockchain_service = get_blockchain_service()
                 blockchain_service.record_swap_created(swap, self.request.user)
 
                 self.object = swap
@@ -218,7 +214,7 @@ class UploadClientProofView(LoginRequiredMixin, DetailView):
     context_object_name = 'swap'
 
     def get_queryset(self):
-        return SwapRequest.objects.filter(client=self.request.user, status='ACCEPTED')
+        return SwapRequest.objects.with_parties().filter(client=self.request.user, status='ACCEPTED')
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -255,7 +251,8 @@ class UploadClientProofView(LoginRequiredMixin, DetailView):
                 # Update swap status
                 swap.status = 'CLIENT_PROOF_UPLOADED'
                 swap.client_proof_uploaded_at = timezone.now()
-                swap.save()
+                # Leave the proof flags to the ProofUpload signal / admin
+                swap.save(update_fields=['status', 'client_proof_uploaded_at', 'updated_at'])
 
                 # Notify agent
                 Notification.objects.create(
@@ -266,7 +263,7 @@ class UploadClientProofView(LoginRequiredMixin, DetailView):
                 )
 
                 # Record on blockchain
-                blockchain_service = BlockchainService()
+                blockchain_service = get_blockchain_service()
                 blockchain_service.record_swap_paid_bank(swap, request.user)
 
                 messages.success(request, "Payment proof uploaded! Agent has been notified to send wallet funds.")
@@ -281,7 +278,7 @@ class UploadAgentProofView(LoginRequiredMixin, DetailView):
     context_object_name = 'swap'
 
     def get_queryset(self):
-        return SwapRequest.objects.filter(agent__user=self.request.user, status='CLIENT_PROOF_UPLOADED')
+        return SwapRequest.objects.with_parties().filter(agent__user=self.request.user, status='CLIENT_PROOF_UPLOADED')
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -320,10 +317,11 @@ class UploadAgentProofView(LoginRequiredMixin, DetailView):
                 # Update swap status
                 swap.status = 'AGENT_PROOF_UPLOADED'
                 swap.agent_proof_uploaded_at = timezone.now()
-                swap.save()
+                # Leave the proof flags to the ProofUpload signal / admin
+                swap.save(update_fields=['status', 'agent_proof_uploaded_at', 'updated_at'])
 
                 # Record on blockchain
-                blockchain_service = BlockchainService()
+                blockchain_service = get_blockchain_service()
                 blockchain_service.record_swap_sent_wallet(swap, request.user)
 
                 # Auto-complete if both proofs are verified
@@ -345,11 +343,12 @@ class SwapDetailView(LoginRequiredMixin, DetailView):
 
     def get_queryset(self):
         user = self.request.user
+        swaps = SwapRequest.objects.with_parties()
         if user.role == 'client':
-            return SwapRequest.objects.filter(client=user)
+            return swaps.filter(client=user)
         elif user.role == 'agent':
-            return SwapRequest.objects.filter(agent__user=user)
-        return SwapRequest.objects.all()
+            return swaps.filter(agent__user=user)
+        return swaps
 
 class AgentResponseView(LoginRequiredMixin, View):
     def post(self, request, pk):
@@ -371,14 +370,14 @@ class AgentResponseView(LoginRequiredMixin, View):
                 swap.agent.update_response_time(response_time)
 
                 # Record on blockchain
-                blockchain_service = BlockchainService()
+                blockchain_service = get_blockchain_service()
                 blockchain_service.record_swap_reserved(swap, request.user)
             else:
                 swap.status = 'REJECTED'
                 message = f"Agent {request.user.username} rejected your swap request"
                 notification_type = 'swap_rejected'
 
-            swap.save()
+            swap.save(update_fields=['status', 'agent_response_at', 'updated_at'])
 
             Notification.objects.create(
                 user=swap.client,
@@ -427,7 +426,7 @@ class AgentDashboardView(LoginRequiredMixin, TemplateView):
 
         context.update({
             'agent': agent,
-            'swaps': swaps.order_by('-created_at'),
+            'swaps': swaps.with_parties().order_by('-created_at'),
             'weekly_earnings': weekly_earnings,
             'monthly_earnings': monthly_earnings,
             'pending_swaps': swaps.filter(status='PENDING').count(),
@@ -441,7 +440,8 @@ class ToggleOnlineStatusView(LoginRequiredMixin, View):
         try:
             agent = request.user.agent
             agent.is_online = not agent.is_online
-            agent.save()
+            # Counters are maintained with F() updates; don't write them back
+            agent.save(update_fields=['is_online'])
             return JsonResponse({
                 'success': True, 
                 'is_online': agent.is_online